@@ -1,48 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.db.session import get_async_db, pool_stats
 from app.models.user import User
 from app.models.audit_log import AuditLog
-from app.schemas.user import User as UserSchema, UserUpdate
-from app.schemas.audit_log import AuditLog as AuditLogSchema
+from app.schemas.user import User as UserSchema, UserList, UserUpdate
+from app.schemas.audit_log import AuditLogList, ActivityStats
+from app.schemas.job import Job as JobSchema
 from app.api.deps import get_current_admin_user
-from app.services.audit import log_action
+from app.core.config import settings
+from app.core.security import hash_pool, token_cache_stats
+from app.services.activity import activity_series, top_actors
+from app.services.audit import log_action, audit_log_filters, count_audit_logs
+from app.services.audit_buffer import audit_buffer
+from app.services.email import mail_queue
+from app.services.audit_retention import archive_audit_logs
+from app.services.compression import recompress_notes
+from app.services.jobs import create_job, get_job
+from app.services.pagination import keyset_paginate, next_cursor, InvalidCursor
+from app.services.revisions import compact_revisions
+from app.services.users import count_users, email_search, user_filters
+from app.services import user_cache
 
 router = APIRouter()
 
 
-@router.get("/users", response_model=List[UserSchema])
-def get_users(
+@router.get("/users", response_model=UserList)
+async def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; replaces skip"),
+    q: Optional[str] = Query(None, min_length=1, description="Case-insensitive email search"),
+    match: str = Query("prefix", pattern="^(prefix|contains)$", description="Match q at the start of the email or anywhere in it"),
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_admin_user)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    """Users, newest first, filtered and searched by email; totals come from maintained counters.
+
+    A search total has to be counted, so it is only returned with the first page (no cursor).
+    """
+
+    def handle(db: Session):
+        search = email_search(db, q, match) if q else None
+        conditions = user_filters(role, is_active, is_verified)
+        if search is not None:
+            conditions.append(search)
+        query = keyset_paginate(select(User).where(*conditions), User.created_at, User.id, cursor, limit)
+        if not cursor:
+            query = query.offset(skip)
+        users = db.scalars(query).all()
+        if search is not None and cursor:
+            return users, None
+        return users, count_users(db, role, is_active, is_verified, search)
+
+    try:
+        users, total = await db.run_sync(handle)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    cursor_value = next_cursor(users, limit)
+    if cursor_value:
+        response.headers["X-Next-Cursor"] = cursor_value
+    return UserList(users=users, total=total)
 
 
 @router.get("/users/{user_id}", response_model=UserSchema)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_admin_user)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
 @router.put("/users/{user_id}/role", response_model=UserSchema)
-def change_user_role(
+async def change_user_role(
     user_id: int,
     role_data: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_admin_user)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -53,25 +101,25 @@ def change_user_role(
         raise HTTPException(status_code=400, detail="Invalid role")
     
     user.role = new_role
-    db.commit()
-    db.refresh(user)
-    
-    log_action(
-        db, "role_change", actor_id=current_user.id,
+    await db.run_sync(
+        log_action, "role_change", actor_id=current_user.id,
         target_type="user", target_id=user.id,
         payload={"old_role": old_role, "new_role": new_role}
     )
+    await db.commit()
+    await run_in_threadpool(user_cache.invalidate, user.id)
+    await db.refresh(user)
     return user
 
 
 @router.put("/users/{user_id}/status", response_model=UserSchema)
-def change_user_status(
+async def change_user_status(
     user_id: int,
     status_data: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_admin_user)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -79,67 +127,184 @@ def change_user_status(
         raise HTTPException(status_code=400, detail="Cannot change your own status")
     
     user.is_active = status_data.get("is_active", user.is_active)
-    db.commit()
-    db.refresh(user)
-    
-    log_action(
-        db, "status_change", actor_id=current_user.id,
+    await db.run_sync(
+        log_action, "status_change", actor_id=current_user.id,
         target_type="user", target_id=user.id,
         payload={"is_active": user.is_active}
     )
+    await db.commit()
+    await run_in_threadpool(user_cache.invalidate, user.id)
+    await db.refresh(user)
     return user
 
 
 @router.put("/users/{user_id}", response_model=UserSchema)
-def update_user(
+async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_admin_user)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     old_role = user.role
     for field, value in user_update.dict(exclude_unset=True).items():
         setattr(user, field, value)
-    db.commit()
-    db.refresh(user)
-    
     if user_update.role and user_update.role != old_role:
-        log_action(
-            db, "change_role", actor_id=current_user.id,
+        await db.run_sync(
+            log_action, "change_role", actor_id=current_user.id,
             target_type="user", target_id=user.id,
             payload={"old_role": old_role, "new_role": user_update.role}
         )
+    await db.commit()
+    await run_in_threadpool(user_cache.invalidate, user.id)
+    await db.refresh(user)
     return user
 
 
 @router.delete("/users/{user_id}")
-def delete_user(
+async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_admin_user)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if user.id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    db.delete(user)
-    db.commit()
-    log_action(db, "delete_user", actor_id=current_user.id, target_type="user", target_id=user_id)
+    await db.delete(user)
+    await db.run_sync(log_action, "delete_user", actor_id=current_user.id, target_type="user", target_id=user_id)
+    await db.commit()
+    await run_in_threadpool(user_cache.invalidate, user_id)
     return {"message": "User deleted successfully"}
 
 
-@router.get("/audit", response_model=List[AuditLogSchema])
-def get_audit_logs_endpoint(
+@router.get("/audit", response_model=AuditLogList)
+async def get_audit_logs_endpoint(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; replaces skip"),
+    actor_id: Optional[int] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[int] = None,
+    ip: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Only events at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only events before this time"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Audit events, newest first, filtered; total is exact when filtered and estimated otherwise"""
+    conditions = audit_log_filters(actor_id, action, target_type, target_id, ip, since, until)
+    try:
+        query = keyset_paginate(select(AuditLog).where(*conditions), AuditLog.created_at, AuditLog.id, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not cursor:
+        query = query.offset(skip)
+    logs = (await db.scalars(query)).all()
+    cursor_value = next_cursor(logs, limit)
+    if cursor_value:
+        response.headers["X-Next-Cursor"] = cursor_value
+    total = await db.run_sync(count_audit_logs, conditions)
+    return AuditLogList(logs=logs, total=total)
+
+
+@router.post("/audit/archive", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def archive_audit_logs_endpoint(
+    background_tasks: BackgroundTasks,
+    current_user = Depends(get_current_admin_user)
+):
+    """Archive and remove audit history older than the configured retention, in the background"""
+    if not settings.audit_retention_months:
+        raise HTTPException(status_code=400, detail="Audit log retention is disabled")
+    job = await run_in_threadpool(create_job, "archive_audit_logs", current_user.id)
+    background_tasks.add_task(archive_audit_logs, job)
+    return job
+
+
+@router.post("/notes/recompress", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def recompress_notes_endpoint(
+    background_tasks: BackgroundTasks,
+    current_user = Depends(get_current_admin_user)
+):
+    """Rewrite stored note bodies with the current compression settings, in chunks, in the background"""
+    job = await run_in_threadpool(create_job, "recompress_notes", current_user.id)
+    background_tasks.add_task(recompress_notes, job)
+    return job
+
+
+@router.post("/notes/revisions/compact", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def compact_revisions_endpoint(
+    background_tasks: BackgroundTasks,
     current_user = Depends(get_current_admin_user)
 ):
-    logs = db.query(AuditLog).order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
-    return logs
+    """Apply the revision retention settings to all notes in the background"""
+    job = await run_in_threadpool(create_job, "compact_revisions", current_user.id)
+    background_tasks.add_task(compact_revisions, job)
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobSchema)
+async def get_job_endpoint(
+    job_id: str,
+    current_user = Depends(get_current_admin_user)
+):
+    job = await run_in_threadpool(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/stats/pool")
+async def get_pool_stats(current_user = Depends(get_current_admin_user)):
+    """Connection pool occupancy and checkout wait times for each database engine"""
+    return pool_stats()
+
+
+@router.get("/stats/auth")
+async def get_auth_stats(current_user = Depends(get_current_admin_user)):
+    """Verified-token and authenticated-user cache counters, and password hashing pool load"""
+    return {"tokens": token_cache_stats(), "users": user_cache.stats(), "password_hashing": hash_pool.stats()}
+
+
+@router.get("/stats/audit")
+async def get_audit_stats(current_user = Depends(get_current_admin_user)):
+    """Audit writer buffer depth, batches written and events dropped"""
+    return audit_buffer.stats()
+
+
+@router.get("/stats/email")
+async def get_email_stats(current_user = Depends(get_current_admin_user)):
+    """Outgoing mail queue depth, delivery outcomes and queue-to-delivery latency"""
+    return mail_queue.stats()
+
+
+@router.get("/stats/activity", response_model=ActivityStats)
+async def get_activity_stats(
+    since: Optional[datetime] = Query(None, description="Start of the range; defaults to 7 days before until"),
+    until: Optional[datetime] = Query(None, description="End of the range (exclusive); defaults to now"),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    actions: Optional[str] = Query(None, description="Comma-separated actions to include; all when omitted"),
+    actor_id: Optional[int] = Query(None, description="Series for one actor instead of everyone"),
+    top: int = Query(10, ge=0, le=100, description="How many of the most active actors to list"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Audit event counts per hour or day, and the most active actors, from the hourly rollups"""
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(days=7)
+    action_list = [name.strip() for name in actions.split(",") if name.strip()] if actions else None
+
+    def handle(db: Session):
+        series = activity_series(db, since, until, granularity, action_list, actor_id or 0)
+        leaders = top_actors(db, since, until, action_list, top) if top else []
+        return series, leaders
+
+    series, leaders = await db.run_sync(handle)
+    return ActivityStats(since=since, until=until, granularity=granularity, series=series, top_actors=leaders)
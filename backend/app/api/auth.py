@@ -1,90 +1,116 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
 from app.models.user import User
 from app.schemas.auth import (
     Token, LoginRequest, RegisterRequest,
     PasswordResetRequest, PasswordResetConfirm, EmailVerificationRequest
 )
 from app.schemas.user import User as UserSchema
+from app.core.security import get_password_hash_async, verify_token
 from app.services.auth import (
-    authenticate_user, create_user, verify_email,
-    create_password_reset_token, reset_password, create_tokens, refresh_access_token, logout
+    add_user, authenticate_user_async, verify_email, send_password_reset, password_reset_user_id, clear_password_reset,
+    create_tokens, refresh_access_token, logout
 )
 from app.services.audit import log_action
+from app.services.email import send_verification_email
+from app.services import user_cache
+from app.services.user_cache import UserSnapshot
 from app.api.deps import get_current_user
 
 router = APIRouter()
 
+# Redis calls block, so they run in the threadpool rather than on the event loop; bcrypt runs in
+# the bounded password hashing pool and email is only queued for the background mail workers
+
 
 @router.post("/register", response_model=Token)
-def register(request: RegisterRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == request.email).first()
+async def register(request: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == request.email))
     if user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = create_user(db, request.email, request.password)
-    tokens = create_tokens(user)
-    log_action(db, "register", actor_id=user.id, target_type="user", target_id=user.id)
+    hashed_password = await get_password_hash_async(request.password)
+    user = await db.run_sync(add_user, request.email, hashed_password)
+    send_verification_email(user.email, user.verification_token)
+    tokens = await run_in_threadpool(create_tokens, user)
+    await db.run_sync(log_action, "register", actor_id=user.id, target_type="user", target_id=user.id)
+    await db.commit()
     return tokens
 
 
 @router.post("/verify-email")
-def verify_email_endpoint(request: EmailVerificationRequest, db: Session = Depends(get_db)):
-    if not verify_email(db, request.token):
+async def verify_email_endpoint(request: EmailVerificationRequest, db: AsyncSession = Depends(get_async_db)):
+    user_id = await db.run_sync(verify_email, request.token)
+    if user_id is None:
         raise HTTPException(status_code=400, detail="Invalid token")
+    await run_in_threadpool(user_cache.invalidate, user_id)
     return {"message": "Email verified successfully"}
 
 
 @router.post("/login", response_model=Token)
-def login(request: LoginRequest, db: Session = Depends(get_db), req: Request = None):
-    user = authenticate_user(db, request.email, request.password)
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db), req: Request = None):
+    user = await authenticate_user_async(db, request.email, request.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     if not user.is_verified:
         raise HTTPException(status_code=400, detail="Email not verified")
-    tokens = create_tokens(user)
-    log_action(
-        db, "login", actor_id=user.id,
+    tokens = await run_in_threadpool(create_tokens, user)
+    await db.run_sync(
+        log_action, "login", actor_id=user.id,
         ip=req.client.host if req else None,
         user_agent=req.headers.get("user-agent") if req else None
     )
+    await db.commit()
     return tokens
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
+async def refresh_token(refresh_token: str):
     # Extract user_id from refresh token
-    from app.core.security import verify_token
     user_id = verify_token(refresh_token, "refresh")
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
-    tokens = refresh_access_token(int(user_id), refresh_token)
+    tokens = await run_in_threadpool(refresh_access_token, int(user_id), refresh_token)
     if not tokens:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     return tokens
 
 
 @router.get("/me", response_model=UserSchema)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
-    return current_user
+async def get_current_user_info(current_user: UserSnapshot = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    # The cached snapshot only covers authorization; the profile is read fresh
+    user = await db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 
 @router.post("/logout")
-def logout_endpoint(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
-    logout(current_user.id)
-    log_action(db, "logout", actor_id=current_user.id)
+async def logout_endpoint(current_user = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    await run_in_threadpool(logout, current_user.id)
+    await db.run_sync(log_action, "logout", actor_id=current_user.id)
+    await db.commit()
     return {"message": "Logged out successfully"}
 
 
 @router.post("/password-reset-request")
-def password_reset_request(request: PasswordResetRequest, db: Session = Depends(get_db)):
-    if not create_password_reset_token(db, request.email):
+async def password_reset_request(request: PasswordResetRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == request.email))
+    if not user:
         raise HTTPException(status_code=400, detail="Email not found")
+    await run_in_threadpool(send_password_reset, user)
     return {"message": "Password reset email sent"}
 
 
 @router.post("/password-reset-confirm")
-def password_reset_confirm(request: PasswordResetConfirm, db: Session = Depends(get_db)):
-    if not reset_password(db, request.token, request.new_password):
+async def password_reset_confirm(request: PasswordResetConfirm, db: AsyncSession = Depends(get_async_db)):
+    user_id = await run_in_threadpool(password_reset_user_id, request.token)
+    user = await db.get(User, user_id) if user_id else None
+    if not user:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
+    user.hashed_password = await get_password_hash_async(request.new_password)
+    await db.commit()
+    await run_in_threadpool(clear_password_reset, request.token)
     return {"message": "Password reset successfully"}
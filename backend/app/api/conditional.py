@@ -0,0 +1,45 @@
+import hashlib
+from typing import Optional
+from fastapi import HTTPException, Request, Response
+
+
+def make_etag(data: bytes, weak: bool = False) -> str:
+    tag = f'"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+    return f"W/{tag}" if weak else tag
+
+
+def _strip_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison as required for If-None-Match."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = _strip_weak(etag)
+    return any(_strip_weak(candidate.strip()) == wanted for candidate in header.split(","))
+
+
+def etag_matches_strong(header: Optional[str], etag: str) -> bool:
+    """Strong comparison as required for If-Match: weak validators never match."""
+    if header.strip() == "*":
+        return True
+    if etag.startswith("W/"):
+        return False
+    return any(candidate.strip() == etag for candidate in header.split(","))
+
+
+def not_modified(request: Request, etag: str, headers: Optional[dict] = None) -> Optional[Response]:
+    """A 304 response when the client's If-None-Match already covers ``etag``."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+    return None
+
+
+def check_if_match(request: Request, etag: str):
+    """Reject a write with 412 when If-Match is present and does not cover the current ``etag``."""
+    header = request.headers.get("if-match")
+    if header and not etag_matches_strong(header, etag):
+        raise HTTPException(status_code=412, detail="Precondition failed: note has changed")
@@ -1,47 +1,88 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.models.user import User
 from app.core.security import verify_token
-from typing import Generator
+from app.services import user_cache
+from app.services.user_cache import UserSnapshot
 
 
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token = credentials.credentials
-    user_id = verify_token(token, "access")
+
+
+def _token_user_id(credentials: HTTPAuthorizationCredentials) -> int:
+    user_id = verify_token(credentials.credentials, "access")
     if user_id is None:
-        raise credentials_exception
-    user = db.query(User).filter(User.id == int(user_id)).first()
+        raise _credentials_exception()
+    return int(user_id)
+
+
+def _snapshot_query(user_id: int):
+    return select(User.id, User.role, User.is_active, User.is_verified).where(User.id == user_id)
+
+
+def _remember(row, read_generation: int) -> UserSnapshot:
+    if row is None:
+        raise _credentials_exception()
+    user = UserSnapshot(*row)
+    user_cache.put(user, read_generation)
+    return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserSnapshot:
+    user_id = _token_user_id(credentials)
+    user = user_cache.get(user_id)
+    if user is None:
+        read_generation = user_cache.generation()
+        user = _remember((await db.execute(_snapshot_query(user_id))).first(), read_generation)
+    return user
+
+
+def get_current_user_sync(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> UserSnapshot:
+    """``get_current_user`` for sync endpoints: a cache miss reads through the request's own sync session,
+    so one request never holds a connection from each pool."""
+    user_id = _token_user_id(credentials)
+    user = user_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        read_generation = user_cache.generation()
+        user = _remember(db.execute(_snapshot_query(user_id)).first(), read_generation)
     return user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
-def get_current_verified_user(current_user: User = Depends(get_current_active_user)) -> User:
+def get_current_verified_user(current_user: UserSnapshot = Depends(get_current_active_user)) -> UserSnapshot:
     if not current_user.is_verified:
         raise HTTPException(status_code=400, detail="Email not verified")
     return current_user
 
 
-def get_current_admin_user(current_user: User = Depends(get_current_verified_user)) -> User:
+def get_current_verified_user_sync(current_user: UserSnapshot = Depends(get_current_user_sync)) -> UserSnapshot:
+    return get_current_verified_user(get_current_active_user(current_user))
+
+
+def get_current_admin_user(current_user: UserSnapshot = Depends(get_current_verified_user)) -> UserSnapshot:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return current_user
@@ -1,125 +1,509 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
-from app.models.note import Note, Visibility
-from app.schemas.note import Note as NoteSchema, NoteCreate, NoteUpdate, NoteList
-from app.api.deps import get_current_verified_user, get_current_admin_user
+import shutil
+import tempfile
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, status, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+from typing import List, Optional
+from app.db.session import get_async_db, get_db
+from app.models.note import Note, Visibility, content_summary
+from app.schemas.note import (
+    Note as NoteSchema, NoteCreate, NoteUpdate, NoteList, NoteSearchResult, NoteBulkRequest, NoteBulkResponse,
+    NoteImportJob, NotePatch, NoteVersion, NoteRevisionInfo, NoteRevision
+)
+from app.schemas.tag import TagCount
+from app.api.deps import get_current_verified_user, get_current_verified_user_sync, get_current_admin_user
+from app.api.conditional import make_etag, not_modified, check_if_match
+from app.api.projection import parse_fields, project, serialize
+from app.core.config import settings
 from app.services.audit import log_action
+from app.services.pagination import keyset_paginate, next_cursor, InvalidCursor
+from app.services.revisions import superseded, record_revisions, delete_revisions, list_revisions, get_revision
+from app.services.search import search_notes, index_notes, unindex_notes, SearchNotSupported
+from app.services.tags import tag_state, apply_tag_changes, filter_by_tags, tag_counts
+from app.services import feed_cache
+from app.services.bulk import apply_bulk
+from app.services.export import iter_ndjson, iter_markdown_zip
+from app.services.importer import run_import
+from app.services.jobs import Job, create_job, get_job
+from app.services.textdiff import PatchError, apply_ops, apply_unified_diff
 
 router = APIRouter()
 
+# Handlers that only run a few statements are async on the async engine. The rest are plain
+# def endpoints on the sync session, which FastAPI runs in its threadpool: besides the
+# database they touch Redis (feed cache), zlib (compressed bodies), difflib (revisions),
+# snippet highlighting and page serialization, none of which may run on the event loop.
+# Those authenticate through get_current_verified_user_sync, on the same sync session, so
+# a request only ever holds a connection from one of the two pools.
+
+FIELDS_HELP = "'summary' for id, title, tags, visibility, timestamps and a content preview; or a comma-separated column list"
+
+
+def _filter_visible(query, visibility: Optional[str], current_user):
+    if visibility == "my":
+        # Only user's own notes
+        return query.filter(Note.author_id == current_user.id)
+    if visibility == "public":
+        # Only public notes from all users
+        return query.filter(
+            Note.visibility == Visibility.public,
+            Note.is_draft == False
+        )
+    if current_user.role == "admin":
+        # Admin sees all notes
+        return query
+    # Regular users see their own notes + public notes
+    return query.filter(
+        (Note.author_id == current_user.id) |
+        ((Note.visibility == Visibility.public) & (Note.is_draft == False))
+    )
+
+
+def _page_query(query, skip: int, limit: int, cursor: Optional[str]):
+    """Cursor (keyset) mode when a cursor is given, legacy offset mode otherwise."""
+    try:
+        query = keyset_paginate(query, Note.created_at, Note.id, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not cursor:
+        query = query.offset(skip)
+    return query
+
+
+def _serialize_page(query, skip: int, limit: int, cursor: Optional[str], fields: Optional[List[str]]):
+    """Fetch one page, projected to ``fields`` when given, as JSON bytes plus the next cursor."""
+    if fields is not None:
+        query = project(query, fields)
+    rows = _page_query(query, skip, limit, cursor).all()
+    return serialize(rows, fields), next_cursor(rows, limit)
+
+
+def _note_etag(note_id: int, version: int) -> str:
+    return f'"{note_id}-{version}"'
+
+
+def _version_conflict(note_id: int, current: int, base: int) -> HTTPException:
+    return HTTPException(
+        status_code=409, detail=f"Note is at version {current}, not {base}",
+        headers={"ETag": _note_etag(note_id, current)}
+    )
+
+
+def _list_etag(db: Session, page_query, *key) -> str:
+    """Weak ETag for a page, from the ids and versions of its rows in order (no content is read).
+
+    Every edit bumps a note's version, so the page changes exactly when this list does.
+    """
+    rows = page_query.with_entities(Note.id, Note.version).all()
+    return make_etag(repr((key, [tuple(row) for row in rows])).encode(), weak=True)
+
+
+def _compare_and_set(db: Session, note_id: int, base_version: int, **values) -> int:
+    """Write ``values`` as version ``base_version + 1`` only if the note is still at ``base_version``.
+
+    A concurrent save between our read and this write makes it match nothing; the
+    transaction is then rolled back and a 409 (or 404 if the note is gone) raised.
+    """
+    version = base_version + 1
+    if "content" in values:
+        values.update(content_summary(values["content"]))
+    result = db.execute(
+        update(Note)
+        .where(Note.id == note_id, Note.version == base_version)
+        .values(**values, version=version)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        current = db.query(Note.version).filter(Note.id == note_id).scalar()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Note not found")
+        raise _version_conflict(note_id, current, base_version)
+    return version
+
 
 @router.post("/", response_model=NoteSchema)
 def create_note(
     note: NoteCreate,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_verified_user)
+    current_user = Depends(get_current_verified_user_sync)
 ):
     db_note = Note(**note.dict(), author_id=current_user.id)
     db.add(db_note)
+    db.flush()
+    index_notes(db, [db_note])
+    apply_tag_changes(db, [(db_note.id, None, tag_state(db_note))])
+    log_action(db, "create_note", actor_id=current_user.id, target_type="note", target_id=db_note.id)
     db.commit()
     db.refresh(db_note)
-    log_action(db, "create_note", actor_id=current_user.id, target_type="note", target_id=db_note.id)
+    if db_note.is_in_public_feed:
+        feed_cache.invalidate()
     return db_note
 
 
+@router.post("/bulk", response_model=NoteBulkResponse)
+def bulk_notes(
+    request: NoteBulkRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_verified_user_sync)
+):
+    """Create, update and delete many notes in one transaction, with a result per operation"""
+    committed, results = apply_bulk(db, request.operations, current_user, atomic=request.atomic)
+    return NoteBulkResponse(committed=committed, results=results)
+
+
+def _import_job(job: Job) -> NoteImportJob:
+    return NoteImportJob(
+        id=job.id, status=job.status, processed=job.processed, imported=job.succeeded,
+        failed=job.failed, errors=job.errors, created_at=job.created_at, finished_at=job.finished_at
+    )
+
+
+@router.post("/import", response_model=NoteImportJob, status_code=status.HTTP_202_ACCEPTED)
+async def import_notes(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|zip)$", description="ndjson or zip; guessed from the file name if omitted"),
+    current_user = Depends(get_current_verified_user)
+):
+    """Import notes from NDJSON or a ZIP of Markdown files in the background; poll the returned job for progress"""
+    if format is None:
+        format = "zip" if (file.filename or "").lower().endswith(".zip") else "ndjson"
+    # The upload is spooled to a file of our own so the job can read it after the request is gone
+    with tempfile.NamedTemporaryFile(prefix="notes-import-", delete=False) as spool:
+        await run_in_threadpool(shutil.copyfileobj, file.file, spool, 1024 * 1024)
+    job = await run_in_threadpool(create_job, "import_notes", current_user.id)
+    background_tasks.add_task(run_import, job, spool.name, format)
+    return _import_job(job)
+
+
+@router.get("/import/{job_id}", response_model=NoteImportJob)
+async def get_import_job(
+    job_id: str,
+    current_user = Depends(get_current_verified_user)
+):
+    job = await run_in_threadpool(get_job, job_id)
+    if job is None or job.kind != "import_notes" or (job.owner_id != current_user.id and current_user.role != "admin"):
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return _import_job(job)
+
+
 @router.get("/public", response_model=List[NoteSchema])
 def get_public_notes(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; replaces skip"),
+    fields: Optional[str] = Query(None, description=FIELDS_HELP),
     db: Session = Depends(get_db)
 ):
     """Get all public notes (no authentication required)"""
-    notes = db.query(Note).filter(
-        Note.visibility == Visibility.public,
-        Note.is_draft == False
-    ).order_by(Note.created_at.desc()).offset(skip).limit(limit).all()
-    return notes
+    field_names = parse_fields(fields)
+
+    def build():
+        query = db.query(Note).filter(
+            Note.visibility == Visibility.public,
+            Note.is_draft == False
+        )
+        body, cursor_value = _serialize_page(query, skip, limit, cursor, field_names)
+        return feed_cache.FeedPage(body=body, etag=make_etag(body), next_cursor=cursor_value)
+
+    key = feed_cache.page_key(
+        skip=0 if cursor else skip, limit=limit, cursor=cursor or "", fields=",".join(field_names or [])
+    )
+    page = feed_cache.get_or_build(key, build)
+    headers = {"Cache-Control": f"public, max-age={settings.public_feed_max_age}"}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    cached = not_modified(request, page.etag, headers)
+    if cached:
+        return cached
+    return Response(content=page.body, media_type="application/json", headers={"ETag": page.etag, **headers})
 
 
 @router.get("/", response_model=List[NoteSchema])
 def get_notes(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; replaces skip"),
     visibility: str = Query(None, description="Filter by visibility: my, public, all"),
+    tag: List[str] = Query(None, description="Only notes carrying these tags"),
+    tag_match: str = Query("all", pattern="^(all|any)$", description="Require all tags or any of them"),
+    fields: Optional[str] = Query(None, description=FIELDS_HELP),
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_verified_user)
+    current_user = Depends(get_current_verified_user_sync)
 ):
     """Get notes based on filter"""
-    query = db.query(Note)
-    
-    if visibility == "my":
-        # Only user's own notes
-        query = query.filter(Note.author_id == current_user.id)
-    elif visibility == "public":
-        # Only public notes from all users
-        query = query.filter(
-            Note.visibility == Visibility.public,
-            Note.is_draft == False
-        )
-    elif current_user.role == "admin":
-        # Admin sees all notes
-        pass
+    field_names = parse_fields(fields)
+    query = _filter_visible(db.query(Note), visibility, current_user)
+    if tag:
+        query = filter_by_tags(query, tag, match_all=tag_match == "all")
+    etag = _list_etag(
+        db, _page_query(query, skip, limit, cursor),
+        current_user.id, skip, limit, cursor, visibility, tag, tag_match, field_names
+    )
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    body, cursor_value = _serialize_page(query, skip, limit, cursor, field_names)
+    headers = {"ETag": etag}
+    if cursor_value:
+        headers["X-Next-Cursor"] = cursor_value
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/export")
+async def export_notes(
+    format: str = Query("ndjson", pattern="^(ndjson|zip)$", description="ndjson, or zip of Markdown files"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_verified_user)
+):
+    """Stream all of the current user's notes; memory use does not grow with the number of notes"""
+    await db.run_sync(log_action, "export_notes", actor_id=current_user.id, payload={"format": format})
+    await db.commit()
+    if format == "zip":
+        body, media_type, filename = iter_markdown_zip(current_user.id), "application/zip", "notes.zip"
     else:
-        # Regular users see their own notes + public notes
-        query = query.filter(
-            (Note.author_id == current_user.id) |
-            ((Note.visibility == Visibility.public) & (Note.is_draft == False))
-        )
-    
-    notes = query.order_by(Note.created_at.desc()).offset(skip).limit(limit).all()
-    return notes
+        body, media_type, filename = iter_ndjson(current_user.id), "application/x-ndjson", "notes.ndjson"
+    return StreamingResponse(
+        body, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/tags", response_model=List[TagCount])
+async def get_tag_counts(
+    scope: str = Query("public", pattern="^(public|my|all)$", description="public, my, or all (admin only)"),
+    limit: int = Query(50, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_verified_user)
+):
+    """Tag facets with note counts, most used first"""
+    if scope == "all" and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    rows = await db.run_sync(tag_counts, scope, user_id=current_user.id, limit=limit)
+    return [TagCount(name=name, count=count) for name, count in rows]
+
+
+@router.get("/search", response_model=List[NoteSearchResult])
+def search_notes_endpoint(
+    q: str = Query(..., min_length=1, description="Search terms"),
+    skip: int = 0,
+    limit: int = Query(20, le=100),
+    visibility: str = Query(None, description="Filter by visibility: my, public, all"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_verified_user_sync)
+):
+    """Full-text search over title and content, best matches first"""
+    query = _filter_visible(db.query(Note), visibility, current_user)
+    try:
+        results = search_notes(db, query, q, skip=skip, limit=limit)
+    except SearchNotSupported as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return [
+        NoteSearchResult(**NoteSchema.model_validate(note).model_dump(), rank=rank, snippet=snippet)
+        for note, rank, snippet in results
+    ]
 
 
 @router.get("/{note_id}", response_model=NoteSchema)
 def get_note(
     note_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_verified_user)
+    current_user = Depends(get_current_verified_user_sync)
 ):
-    note = db.query(Note).filter(Note.id == note_id).first()
-    if not note:
+    # Authorize and revalidate from a narrow row before loading the note body
+    head = db.query(Note.author_id, Note.visibility, Note.version).filter(Note.id == note_id).first()
+    if not head:
         raise HTTPException(status_code=404, detail="Note not found")
-    if note.author_id != current_user.id and note.visibility != Visibility.public and current_user.role != "admin":
+    if head.author_id != current_user.id and head.visibility != Visibility.public and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to view this note")
-    return note
+    etag = _note_etag(note_id, head.version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+    return db.query(Note).filter(Note.id == note_id).first()
 
 
 @router.put("/{note_id}", response_model=NoteSchema)
 def update_note(
     note_id: int,
     note_update: NoteUpdate,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_verified_user)
+    current_user = Depends(get_current_verified_user_sync)
 ):
     note = db.query(Note).filter(Note.id == note_id).first()
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     if note.author_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to update this note")
-    
-    for field, value in note_update.dict(exclude_unset=True).items():
-        setattr(note, field, value)
-    db.commit()
+    check_if_match(request, _note_etag(note.id, note.version))
+
+    was_public = note.is_in_public_feed
+    old_tags = tag_state(note)
+    changes = note_update.dict(exclude_unset=True)
+    replaced = superseded(note, changes.get("content", note.content))
+    _compare_and_set(db, note_id, note.version, **changes)
     db.refresh(note)
+    record_revisions(db, [replaced])
+    if "title" in changes or "content" in changes:
+        index_notes(db, [note])
+    apply_tag_changes(db, [(note.id, old_tags, tag_state(note))])
     log_action(db, "update_note", actor_id=current_user.id, target_type="note", target_id=note.id)
+    db.commit()
+    db.refresh(note)
+    response.headers["ETag"] = _note_etag(note.id, note.version)
+    if was_public or note.is_in_public_feed:
+        feed_cache.invalidate()
     return note
 
 
-@router.delete("/{note_id}")
-def delete_note(
+@router.patch("/{note_id}", response_model=NoteVersion)
+def patch_note(
     note_id: int,
+    patch: NotePatch,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_verified_user)
+    current_user = Depends(get_current_verified_user_sync)
 ):
+    """Apply a content delta (insert/delete ops or a unified diff) made against ``base_version``"""
+    if (patch.ops is None) == (patch.diff is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of 'ops' or 'diff'")
+    note = db.query(Note).filter(Note.id == note_id).first()
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if note.author_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to update this note")
+    if note.version != patch.base_version:
+        raise _version_conflict(note_id, note.version, patch.base_version)
+
+    try:
+        content = apply_ops(note.content, patch.ops) if patch.ops is not None else apply_unified_diff(note.content, patch.diff)
+    except PatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    version = _compare_and_set(db, note_id, patch.base_version, content=content)
+    index_notes(db, [Note(id=note_id, title=note.title, content=content)])
+    record_revisions(db, [superseded(note, content)])
+    log_action(db, "update_note", actor_id=current_user.id, target_type="note", target_id=note_id, payload={"patch": True})
+    db.commit()
+    response.headers["ETag"] = _note_etag(note_id, version)
+    if note.is_in_public_feed:
+        feed_cache.invalidate()
+    return NoteVersion(id=note_id, version=version)
+
+
+def _get_own_note(db: Session, note_id: int, current_user, action: str) -> Note:
     note = db.query(Note).filter(Note.id == note_id).first()
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     if note.author_id != current_user.id and current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Not authorized to delete this note")
-    
-    db.delete(note)
+        raise HTTPException(status_code=403, detail=f"Not authorized to {action} this note")
+    return note
+
+
+@router.get("/{note_id}/revisions", response_model=List[NoteRevisionInfo])
+async def get_note_revisions(
+    note_id: int,
+    skip: int = 0,
+    limit: int = Query(50, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_verified_user)
+):
+    """Earlier versions of a note, newest first; the current version is the note itself"""
+    head = (await db.execute(select(Note.author_id).where(Note.id == note_id))).first()
+    if not head:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if head.author_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to view the history of this note")
+    rows = await db.run_sync(list_revisions, note_id, skip, limit)
+    return [
+        NoteRevisionInfo(version=version, title=title, saved_at=saved_at)
+        for version, title, saved_at in rows
+    ]
+
+
+@router.get("/{note_id}/revisions/{version}", response_model=NoteRevision)
+def get_note_revision(
+    note_id: int,
+    version: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_verified_user_sync)
+):
+    note = _get_own_note(db, note_id, current_user, "view the history of")
+    revision = get_revision(db, note, version)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    title, content, saved_at = revision
+    return NoteRevision(version=version, title=title, content=content, saved_at=saved_at)
+
+
+@router.post("/{note_id}/revisions/{version}/restore", response_model=NoteSchema)
+def restore_note_revision(
+    note_id: int,
+    version: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_verified_user_sync)
+):
+    """Make an earlier version's title and content current again, as a new version"""
+    note = _get_own_note(db, note_id, current_user, "update")
+    check_if_match(request, _note_etag(note.id, note.version))
+    revision = get_revision(db, note, version)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+
+    title, content, _ = revision
+    replaced = superseded(note, content)
+    _compare_and_set(db, note_id, note.version, title=title, content=content)
+    db.refresh(note)
+    record_revisions(db, [replaced])
+    index_notes(db, [note])
+    log_action(db, "restore_note", actor_id=current_user.id, target_type="note", target_id=note.id, payload={"version": version})
     db.commit()
-    log_action(db, "delete_note", actor_id=current_user.id, target_type="note", target_id=note_id)
+    db.refresh(note)
+    response.headers["ETag"] = _note_etag(note.id, note.version)
+    if note.is_in_public_feed:
+        feed_cache.invalidate()
+    return note
+
+
+@router.delete("/{note_id}")
+async def delete_note(
+    note_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_verified_user)
+):
+    def handle(db: Session) -> bool:
+        # Only what the checks and tag counters need; the body is never read
+        note = (
+            db.query(Note)
+            .options(load_only(Note.author_id, Note.visibility, Note.is_draft, Note.tags))
+            .filter(Note.id == note_id)
+            .first()
+        )
+        if not note:
+            raise HTTPException(status_code=404, detail="Note not found")
+        if note.author_id != current_user.id and current_user.role != "admin":
+            raise HTTPException(status_code=403, detail="Not authorized to delete this note")
+        apply_tag_changes(db, [(note_id, tag_state(note), None)])
+        unindex_notes(db, [note_id])
+        delete_revisions(db, [note_id])
+        db.execute(delete(Note).where(Note.id == note_id))
+        log_action(db, "delete_note", actor_id=current_user.id, target_type="note", target_id=note_id)
+        return note.is_in_public_feed
+
+    was_public = await db.run_sync(handle)
+    await db.commit()
+    if was_public:
+        await run_in_threadpool(feed_cache.invalidate)
     return {"message": "Note deleted successfully"}
@@ -0,0 +1,57 @@
+import json
+from typing import List, Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy.orm import load_only
+from app.models.note import Note
+from app.schemas.note import Note as NoteSchema, NoteSummary
+
+
+COLUMN_FIELDS = {
+    column.key: column
+    for column in (
+        Note.id, Note.title, Note.content, Note.visibility, Note.is_draft, Note.tags,
+        Note.author_id, Note.created_at, Note.updated_at, Note.version,
+        # Stored at write time, so neither needs the body (which may be compressed)
+        Note.content_preview, Note.content_length,
+    )
+}
+SUMMARY_FIELDS = list(NoteSummary.model_fields)
+
+_full_list = TypeAdapter(List[NoteSchema])
+_summary_list = TypeAdapter(List[NoteSummary])
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """``None`` for the full note, otherwise the ordered list of requested fields."""
+    if not fields:
+        return None
+    if fields == "summary":
+        return SUMMARY_FIELDS
+    names = []
+    for name in fields.split(","):
+        name = name.strip()
+        if name not in COLUMN_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def project(query, names: List[str]):
+    """Load only the requested columns; content is never fetched unless asked for by name.
+
+    id and created_at are always loaded because keyset pagination needs them.
+    """
+    columns = {"id", "created_at"} | set(names)
+    return query.options(load_only(*[COLUMN_FIELDS[name] for name in columns]))
+
+
+def serialize(rows, names: Optional[List[str]]) -> bytes:
+    if names is None:
+        return _full_list.dump_json(_full_list.validate_python(rows, from_attributes=True))
+    items = [{name: getattr(note, name) for name in names} for note in rows]
+    if names == SUMMARY_FIELDS:
+        return _summary_list.dump_json(_summary_list.validate_python(items))
+    return json.dumps(jsonable_encoder(items), separators=(",", ":")).encode()
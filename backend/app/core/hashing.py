@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class HashPoolSaturated(Exception):
+    """Every worker is busy and the queue is full; the caller should retry later."""
+
+
+class HashPool:
+    """Bounded pool for password hashing and verification.
+
+    bcrypt releases the GIL while it works, so threads run hashes in parallel
+    without stalling the rest of the process; the pool caps how many run at once
+    and how many may wait, and rejects work beyond that instead of queueing it.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0  # Submitted and not finished, running or queued
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+
+    def submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise HashPoolSaturated()
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.running -= 1
+                    self._pending -= 1
+                    self.completed += 1
+                    self.wait_seconds_total += started - submitted
+                    self.wait_seconds_max = max(self.wait_seconds_max, started - submitted)
+                    self.run_seconds_total += finished - started
+                    self.run_seconds_max = max(self.run_seconds_max, finished - started)
+
+        try:
+            return self._executor.submit(task)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def call(self, fn: Callable, *args) -> Any:
+        """Run ``fn`` in the pool and block the calling thread until it is done."""
+        return self.submit(fn, *args).result()
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn`` in the pool without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "running": self.running,
+                "queued": self._pending - self.running,
+                "completed": completed,
+                "rejected": self.rejected,
+                "wait_ms_avg": round(self.wait_seconds_total * 1000 / completed, 3) if completed else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+                "run_ms_avg": round(self.run_seconds_total * 1000 / completed, 3) if completed else 0.0,
+                "run_ms_max": round(self.run_seconds_max * 1000, 3),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
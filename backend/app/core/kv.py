@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+Value = Union[str, bytes, int]
+
+# Replace KEYS[1] with ARGV[2] (expiring in ARGV[3] seconds) only if it still holds ARGV[1]
+_COMPARE_AND_SET = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+def _to_bytes(value: Value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+class RedisStore:
+    """Keys in Redis, shared by every worker."""
+
+    def __init__(self):
+        self._compare_and_set = None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return get_redis().get(key)
+
+    def setex(self, key: str, ttl: int, value: Value):
+        get_redis().setex(key, ttl, value)
+
+    def delete(self, *keys: str):
+        if keys:
+            get_redis().delete(*keys)
+
+    def compare_and_set(self, key: str, expected: Value, value: Value, ttl: int) -> bool:
+        """Atomically swap ``key`` from ``expected`` to ``value``, in one round trip."""
+        if self._compare_and_set is None:
+            self._compare_and_set = get_redis().register_script(_COMPARE_AND_SET)
+        return bool(self._compare_and_set(keys=[key], args=[expected, value, ttl]))
+
+
+class MemoryStore:
+    """Keys in this process only, for single-node deployments and tests."""
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry[0]
+
+    def _set(self, key: str, ttl: int, value: Value):
+        self._data[key] = (_to_bytes(value), time.monotonic() + ttl)
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            now = time.monotonic()
+            for expired in [k for k, (_, expires_at) in self._data.items() if expires_at <= now]:
+                del self._data[expired]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(key)
+
+    def setex(self, key: str, ttl: int, value: Value):
+        with self._lock:
+            self._set(key, ttl, value)
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def compare_and_set(self, key: str, expected: Value, value: Value, ttl: int) -> bool:
+        with self._lock:
+            if self._live(key) != _to_bytes(expected):
+                return False
+            self._set(key, ttl, value)
+            return True
+
+
+KeyValueStore = Union[RedisStore, MemoryStore]
+BACKENDS = {"redis": RedisStore, "memory": MemoryStore}
+
+_store = None
+
+
+def get_kv() -> KeyValueStore:
+    """The process-wide store for short-lived keys (refresh and password reset tokens, job status)."""
+    global _store
+    if _store is None:
+        if settings.kv_backend not in BACKENDS:
+            raise ValueError(f"Unknown KV_BACKEND {settings.kv_backend!r}, expected one of {', '.join(BACKENDS)}")
+        _store = BACKENDS[settings.kv_backend]()
+    return _store
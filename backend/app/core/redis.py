@@ -0,0 +1,28 @@
+import redis
+from app.core.config import settings
+
+
+_pool = None
+_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Process-wide Redis client over a shared, bounded connection pool; connections open on first use."""
+    global _pool, _client
+    if _client is None:
+        _pool = redis.ConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+            health_check_interval=settings.redis_health_check_interval,
+        )
+        _client = redis.Redis(connection_pool=_pool)
+    return _client
+
+
+def close_redis():
+    global _pool, _client
+    if _pool is not None:
+        _pool.disconnect()
+    _pool = _client = None
@@ -1,10 +1,96 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import platform
+import secrets
+import time
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
+from app.core.cache import LRUCache
 from app.core.config import settings
+from app.core.hashing import HashPool
+
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+hash_pool = HashPool(settings.password_hash_workers, settings.password_hash_queue_limit)
+# Verified claims by token hash; an entry expires with the token itself
+_token_cache = LRUCache(maxsize=settings.token_cache_size)
+
+
+# Calibrated costs differ by a round between node types; hashes within this
+# distance of the target are kept, so logins don't rehash back and forth
+BCRYPT_ROUNDS_TOLERANCE = 1
+
+
+def set_bcrypt_rounds(rounds: int):
+    """Hash with ``rounds`` from now on, and update hashes below ``bcrypt_min_rounds`` or out of tolerance."""
+    min_rounds = min(rounds, max(rounds - BCRYPT_ROUNDS_TOLERANCE, settings.bcrypt_min_rounds))
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=min_rounds,
+        bcrypt__max_rounds=rounds + BCRYPT_ROUNDS_TOLERANCE,
+    )
+
+
+def calibrate_bcrypt_rounds(target_ms: float, probe_rounds: int = 8) -> int:
+    """The bcrypt cost whose hashing time on this CPU is nearest ``target_ms``.
+
+    Each extra round doubles the work, so the cost is extrapolated from the best of
+    a few hashes at the cheap ``probe_rounds``.
+    """
+    probe = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=probe_rounds)
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        probe.hash("calibration")
+        timings.append(time.perf_counter() - start)
+    probe_ms = min(timings) * 1000
+    rounds = probe_rounds + round(math.log2(target_ms / probe_ms))
+    return min(max(rounds, settings.bcrypt_min_rounds, 4), 31)
+
+
+def _hardware() -> dict:
+    return {"machine": platform.machine(), "processor": platform.processor(), "cpus": os.cpu_count()}
+
+
+def configure_password_hashing() -> int:
+    """Pick the bcrypt cost for this process and apply it; returns the cost.
+
+    ``bcrypt_rounds`` wins when set. Otherwise a calibration saved in
+    ``bcrypt_calibration_file`` is reused if it was made for the same target on the
+    same kind of hardware, and a fresh one is measured and saved if not.
+    """
+    if settings.bcrypt_rounds:
+        set_bcrypt_rounds(settings.bcrypt_rounds)
+        return settings.bcrypt_rounds
+    path = settings.bcrypt_calibration_file
+    hardware = _hardware()
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+        if saved["target_ms"] == settings.bcrypt_target_ms and saved["hardware"] == hardware:
+            rounds = max(int(saved["rounds"]), settings.bcrypt_min_rounds)
+            set_bcrypt_rounds(rounds)
+            return rounds
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    rounds = calibrate_bcrypt_rounds(settings.bcrypt_target_ms)
+    set_bcrypt_rounds(rounds)
+    logger.info("Calibrated bcrypt cost %s for a %sms target", rounds, settings.bcrypt_target_ms)
+    try:
+        # Written aside and renamed, as several workers may calibrate at once
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"rounds": rounds, "target_ms": settings.bcrypt_target_ms, "hardware": hardware}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not save bcrypt calibration to %s: %s", path, e)
+    return rounds
 
 
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
@@ -22,26 +108,68 @@ def create_refresh_token(subject: Union[str, Any], expires_delta: timedelta = No
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days)
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    # jti keeps two refresh tokens issued within the same second distinct, so rotation always changes it
+    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh", "jti": secrets.token_urlsafe(8)}
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return hash_pool.call(pwd_context.verify, plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_pool.call(pwd_context.hash, password)
 
 
-def verify_token(token: str, token_type: str = "access") -> Union[str, None]:
+def verify_password_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a rehash when the stored hash's bcrypt cost is outside the current tolerance."""
+    return hash_pool.call(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def verify_password_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await hash_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hash_pool.run(pwd_context.hash, password)
+
+
+def decode_token(token: str) -> Union[dict, None]:
+    """Verified claims of ``token``, or None if its signature or claims do not check out.
+
+    Only tokens that passed ``jwt.decode`` are cached, keyed by their SHA-256, so a
+    tampered token never matches an entry and is always verified in full.
+    """
+    if not settings.token_cache_size:
+        return _decode(token)
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        return payload
+    payload = _decode(token)
+    if payload is not None and isinstance(payload.get("exp"), (int, float)):
+        remaining = payload["exp"] - time.time()
+        if remaining > 0:
+            _token_cache.set(key, payload, ttl=remaining)
+    return payload
+
+
+def _decode(token: str) -> Union[dict, None]:
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        if payload.get("type") != token_type:
-            return None
-        return payload.get("sub")
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except jwt.ExpiredSignatureError:
         return None
     except jwt.JWTError:
         return None
+
+
+def verify_token(token: str, token_type: str = "access") -> Union[str, None]:
+    payload = decode_token(token)
+    if payload is None or payload.get("type") != token_type:
+        return None
+    return payload.get("sub")
+
+
+def token_cache_stats() -> dict:
+    return _token_cache.stats()
@@ -1,9 +1,10 @@
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.db.session import get_engine
 from .config import DATABASE_URL
 
-engine = create_engine(DATABASE_URL)
+# Shares the engine, and so the connection pool, of the main app when both point at the same database
+engine = get_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -0,0 +1,34 @@
+"""Composite indexes for keyset pagination of notes
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_notes_visibility_draft_created_id', 'notes',
+        ['visibility', 'is_draft', 'created_at', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_notes_author_created_id', 'notes',
+        ['author_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notes_author_created_id', table_name='notes')
+    op.drop_index('ix_notes_visibility_draft_created_id', table_name='notes')
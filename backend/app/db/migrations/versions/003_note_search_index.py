@@ -0,0 +1,48 @@
+"""Full-text search index for notes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.add_column('notes', sa.Column('search_vector', sa.dialects.postgresql.TSVECTOR(), nullable=True))
+        # Same text search configuration as app.services.search uses for new rows and queries
+        op.get_bind().execute(
+            sa.text(
+                "UPDATE notes SET search_vector = "
+                "setweight(to_tsvector(CAST(:cfg AS regconfig), coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector(CAST(:cfg AS regconfig), coalesce(content, '')), 'B')"
+            ),
+            {"cfg": settings.search_language},
+        )
+        op.create_index('ix_notes_search_vector', 'notes', ['search_vector'], postgresql_using='gin')
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE notes_fts USING fts5(title, content, tokenize='porter unicode61')")
+        op.execute("INSERT INTO notes_fts (rowid, title, content) SELECT id, title, content FROM notes")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_notes_search_vector', table_name='notes')
+        op.drop_column('notes', 'search_vector')
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE notes_fts")
@@ -0,0 +1,87 @@
+"""Normalized tag tables with a batched backfill from notes.tags
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _parse_tags(value):
+    names = []
+    for part in (value or "").split(","):
+        name = part.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade() -> None:
+    tags = op.create_table('tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('note_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('public_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tags_id'), 'tags', ['id'], unique=False)
+    op.create_index(op.f('ix_tags_name'), 'tags', ['name'], unique=True)
+    note_tags = op.create_table('note_tags',
+    sa.Column('note_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('note_id', 'tag_id')
+    )
+    op.create_index('ix_note_tags_tag_id_note_id', 'note_tags', ['tag_id', 'note_id'], unique=False)
+
+    # Backfill in id order, one batch of notes at a time
+    conn = op.get_bind()
+    notes = sa.table('notes', sa.column('id', sa.Integer), sa.column('tags', sa.String))
+    tag_ids = {}
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(notes.c.id, notes.c.tags)
+            .where(notes.c.id > last_id, notes.c.tags.isnot(None), notes.c.tags != '')
+            .order_by(notes.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        pairs = [(row.id, name) for row in rows for name in _parse_tags(row.tags)]
+        new_names = sorted({name for _, name in pairs} - tag_ids.keys())
+        if new_names:
+            conn.execute(tags.insert(), [{'name': name} for name in new_names])
+            tag_ids.update(conn.execute(sa.select(tags.c.name, tags.c.id).where(tags.c.name.in_(new_names))).all())
+        if pairs:
+            conn.execute(note_tags.insert(), [{'note_id': note_id, 'tag_id': tag_ids[name]} for note_id, name in pairs])
+
+    op.execute(
+        "UPDATE tags SET "
+        "note_count = (SELECT count(*) FROM note_tags WHERE note_tags.tag_id = tags.id), "
+        "public_count = (SELECT count(*) FROM note_tags JOIN notes ON notes.id = note_tags.note_id "
+        "WHERE note_tags.tag_id = tags.id AND notes.visibility = 'public' AND notes.is_draft = false)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_note_tags_tag_id_note_id', table_name='note_tags')
+    op.drop_table('note_tags')
+    op.drop_index(op.f('ix_tags_name'), table_name='tags')
+    op.drop_index(op.f('ix_tags_id'), table_name='tags')
+    op.drop_table('tags')
@@ -0,0 +1,38 @@
+"""Note revision history stored as reverse deltas with periodic snapshots
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'note_revisions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('note_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('is_snapshot', sa.Boolean(), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('saved_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('note_id', 'version', name='uq_note_revisions_note_version'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('note_revisions')
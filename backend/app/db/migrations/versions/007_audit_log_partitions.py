@@ -0,0 +1,123 @@
+"""Monthly partitions and a created_at index for audit_logs
+
+On Postgres audit_logs becomes a table partitioned by month of created_at, with a
+default partition; existing rows are copied over and ids keep their sequence.
+SQLite has no partitioning and only gets the index.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 2
+COLUMNS = "id, actor_id, action, target_type, target_id, ip, user_agent, payload, created_at"
+# created_at holds UTC without a zone, as the application writes it (and as partition
+# bounds and retention cutoffs are computed); plain now() would be the server's local time
+UTC_NOW = "(now() AT TIME ZONE 'utc')"
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def _rename_existing(new_name: str):
+    op.execute(f"ALTER TABLE audit_logs RENAME TO {new_name}")
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT audit_logs_pkey TO {new_name}_pkey")
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT audit_logs_actor_id_fkey TO {new_name}_actor_id_fkey")
+    op.execute(f"ALTER INDEX ix_audit_logs_id RENAME TO ix_{new_name}_id")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.create_index(op.f('ix_audit_logs_created_at'), 'audit_logs', ['created_at'], unique=False)
+        return
+
+    _rename_existing("audit_logs_unpartitioned")
+    # The primary key of a partitioned table has to include the partition key
+    op.execute(f"""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            actor_id INTEGER REFERENCES users (id),
+            action VARCHAR NOT NULL,
+            target_type VARCHAR,
+            target_id INTEGER,
+            ip VARCHAR,
+            user_agent VARCHAR,
+            payload JSON,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT {UTC_NOW},
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    oldest, now = bind.execute(sa.text(
+        f"SELECT date_trunc('month', coalesce(min(created_at), {UTC_NOW})), date_trunc('month', {UTC_NOW}) "
+        "FROM audit_logs_unpartitioned"
+    )).one()
+    last = now
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    month = oldest
+    while month <= last:
+        end = _next_month(month)
+        op.execute(
+            f"CREATE TABLE audit_logs_y{month:%Y}m{month:%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+        month = end
+
+    op.execute(
+        f"INSERT INTO audit_logs ({COLUMNS}) "
+        f"SELECT id, actor_id, action, target_type, target_id, ip, user_agent, payload, coalesce(created_at, {UTC_NOW}) "
+        f"FROM audit_logs_unpartitioned"
+    )
+    op.execute("DROP TABLE audit_logs_unpartitioned")
+    op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_created_at'), 'audit_logs', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.drop_index(op.f('ix_audit_logs_created_at'), table_name='audit_logs')
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER INDEX ix_audit_logs_id RENAME TO ix_audit_logs_partitioned_id")
+    op.execute("ALTER INDEX ix_audit_logs_created_at RENAME TO ix_audit_logs_partitioned_created_at")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            actor_id INTEGER,
+            action VARCHAR NOT NULL,
+            target_type VARCHAR,
+            target_id INTEGER,
+            ip VARCHAR,
+            user_agent VARCHAR,
+            payload JSON,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id),
+            CONSTRAINT audit_logs_actor_id_fkey FOREIGN KEY (actor_id) REFERENCES users (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    # Dropping the parent drops every partition with it
+    op.execute("DROP TABLE audit_logs_partitioned")
+    op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
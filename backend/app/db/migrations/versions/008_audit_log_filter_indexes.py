@@ -0,0 +1,35 @@
+"""Composite indexes for filtered keyset pages of the audit log
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_audit_logs_actor_created_id', 'audit_logs', ['actor_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_audit_logs_action_created_id', 'audit_logs', ['action', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_audit_logs_target_created_id', 'audit_logs',
+        ['target_type', 'target_id', 'created_at', 'id'], unique=False
+    )
+    op.create_index('ix_audit_logs_ip_created_id', 'audit_logs', ['ip', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_logs_ip_created_id', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_target_created_id', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_action_created_id', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_actor_created_id', table_name='audit_logs')
@@ -0,0 +1,47 @@
+"""Hourly audit activity rollups, backfilled from the existing audit log
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_activity',
+        sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('actor_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('bucket', 'action', 'actor_id'),
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        hour = "date_trunc('hour', created_at)"
+    else:
+        hour = "strftime('%Y-%m-%d %H:00:00', created_at)"
+    # Actor 0 holds the total over every actor
+    op.execute(
+        f"INSERT INTO audit_activity (bucket, action, actor_id, count) "
+        f"SELECT {hour}, action, 0, count(*) FROM audit_logs WHERE created_at IS NOT NULL GROUP BY 1, 2"
+    )
+    op.execute(
+        f"INSERT INTO audit_activity (bucket, action, actor_id, count) "
+        f"SELECT {hour}, action, actor_id, count(*) FROM audit_logs "
+        f"WHERE created_at IS NOT NULL AND actor_id IS NOT NULL GROUP BY 1, 2, 3"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('audit_activity')
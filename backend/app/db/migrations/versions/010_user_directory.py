@@ -0,0 +1,51 @@
+"""User directory: email search and keyset indexes, and user_stats counters
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_created_id', 'users', ['created_at', 'id'])
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("CREATE INDEX ix_users_email_lower ON users (lower(email) text_pattern_ops)")
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_users_email_trgm ON users USING gin (lower(email) gin_trgm_ops)")
+    else:
+        op.execute("CREATE INDEX ix_users_email_lower ON users (lower(email))")
+
+    op.create_table(
+        'user_stats',
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('is_verified', sa.Boolean(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('role', 'is_active', 'is_verified'),
+    )
+    # NULLs count as the column defaults, as app.models.user_stats does
+    op.execute(
+        "INSERT INTO user_stats (role, is_active, is_verified, count) "
+        "SELECT coalesce(role, 'user'), coalesce(is_active, true), coalesce(is_verified, false), count(*) "
+        "FROM users GROUP BY 1, 2, 3"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_users_email_trgm', table_name='users')
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.drop_index('ix_users_created_id', table_name='users')
@@ -0,0 +1,83 @@
+"""Stored length and preview of note bodies, for summary listings
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import base64
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+PREVIEW_LENGTH = 200
+
+# The stored body format at this revision (see app.db.types): text starting with MARKER
+# is followed by a format byte, "z" for base85-encoded zlib and "r" for escaped raw text
+MARKER = "\x01"
+
+
+def _decode(value: str) -> str:
+    if not value.startswith(MARKER):
+        return value
+    if value[1:2] == "z":
+        return zlib.decompress(base64.b85decode(value[2:])).decode("utf-8")
+    return value[2:]
+
+
+def upgrade() -> None:
+    op.add_column('notes', sa.Column('content_length', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('notes', sa.Column('content_preview', sa.String(), nullable=False, server_default=''))
+    bind = op.get_bind()
+    notes = sa.table(
+        'notes',
+        sa.column('id', sa.Integer),
+        sa.column('content', sa.Text),
+        sa.column('content_length', sa.Integer),
+        sa.column('content_preview', sa.String),
+    )
+    encoded = sa.func.substr(notes.c.content, 1, 1) == MARKER
+    # Plain bodies are measured in SQL; encoded ones have to be decoded here
+    bind.execute(
+        notes.update().where(~encoded).values(
+            content_length=sa.func.length(notes.c.content),
+            content_preview=sa.func.substr(notes.c.content, 1, PREVIEW_LENGTH),
+        )
+    )
+    summarize = (
+        notes.update()
+        .where(notes.c.id == sa.bindparam('n_id'))
+        .values(content_length=sa.bindparam('length'), content_preview=sa.bindparam('preview'))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(notes.c.id, notes.c.content)
+            .where(encoded, notes.c.id > last_id)
+            .order_by(notes.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        summaries = []
+        for note_id, content in rows:
+            text = _decode(content)
+            summaries.append({"n_id": note_id, "length": len(text), "preview": text[:PREVIEW_LENGTH]})
+        bind.execute(summarize, summaries)
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('notes') as batch_op:
+        batch_op.drop_column('content_preview')
+        batch_op.drop_column('content_length')
@@ -0,0 +1,117 @@
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings
+
+
+class WaitStats:
+    """How long checkouts waited for a connection; the wait includes connecting when the pool grows."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waited = 0  # Checkouts slower than settings.db_pool_slow_checkout_ms
+        self.timeouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            if seconds * 1000 >= settings.db_pool_slow_checkout_ms:
+                self.waited += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "slow_checkouts": self.waited,
+                "timeouts": self.timeouts,
+                "wait_ms_total": round(self.total_seconds * 1000, 3),
+                "wait_ms_avg": round(self.total_seconds * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.max_seconds * 1000, 3),
+            }
+
+
+class _InstrumentedPool:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = WaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            **self.wait_stats.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool arguments for ``create_engine``/``create_async_engine`` from settings.
+
+    SQLite keeps SQLAlchemy's defaults where pooling is wrong for it: in memory every
+    new connection would be a new, empty database, and aiosqlite connections belong
+    to the event loop that opened them, so that dialect opens one per checkout.
+    """
+    if is_memory_sqlite(url) or (is_async and make_url(url).get_backend_name() == "sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine):
+    """Set the connection-level SQLite profile on every new connection of ``engine``."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout)}",
+        f"PRAGMA journal_mode = {settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}",
+    ]
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
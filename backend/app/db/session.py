@@ -1,10 +1,69 @@
+import threading
+from typing import Dict, List
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
+from app.db.pool import engine_options, apply_sqlite_pragmas
 
-engine = create_engine(settings.database_url)
+# asyncio driver for each backend the sync URL may name
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+# One engine (and so one pool) per URL for the whole process, whichever stack asks for it
+_engines: Dict[str, Engine] = {}
+_async_engines: Dict[str, AsyncEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def async_database_url(url: str) -> str:
+    """The same database as ``url``, addressed through its asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def get_engine(url: str) -> Engine:
+    with _engines_lock:
+        if url not in _engines:
+            engine = create_engine(url, **engine_options(url))
+            if engine.dialect.name == "sqlite":
+                apply_sqlite_pragmas(engine)
+            _engines[url] = engine
+        return _engines[url]
+
+
+def get_async_engine(url: str) -> AsyncEngine:
+    with _engines_lock:
+        if url not in _async_engines:
+            engine = create_async_engine(url, **engine_options(url, is_async=True))
+            if engine.dialect.name == "sqlite":
+                apply_sqlite_pragmas(engine.sync_engine)
+            _async_engines[url] = engine
+        return _async_engines[url]
+
+
+def pool_stats() -> List[dict]:
+    """Live pool numbers for every engine in the registry."""
+    engines = [(url, engine, "sync") for url, engine in _engines.items()]
+    engines += [(url, engine.sync_engine, "async") for url, engine in _async_engines.items()]
+    stats = []
+    for url, engine, kind in engines:
+        pool = engine.pool
+        entry = {"url": make_url(url).render_as_string(hide_password=True), "kind": kind, "pool": type(pool).__name__}
+        if hasattr(pool, "stats"):
+            entry.update(pool.stats())
+        stats.append(entry)
+    return stats
+
+
+engine = get_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Request handlers use the async engine; background jobs, migrations and scripts keep the sync one
+async_engine = get_async_engine(settings.async_database_url or async_database_url(settings.database_url))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
 class Base(DeclarativeBase):
     pass
@@ -16,3 +75,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
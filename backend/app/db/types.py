@@ -0,0 +1,68 @@
+import base64
+import zlib
+from sqlalchemy import DateTime, Text, func, type_coerce
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.types import TypeDecorator
+from app.core.config import settings
+
+
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds, while bound datetimes
+# carry microseconds. Storing both the same way keeps string comparisons in
+# keyset pagination consistent with the server default.
+Timestamp = DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
+
+# Stored text that starts with MARKER carries a format byte after it:
+#   "z" - zlib-compressed UTF-8, base85-encoded so it still fits a text column
+#   "r" - raw text that happened to start with MARKER itself
+# Anything else is plain text, which is how every row written before the codec reads.
+MARKER = "\x01"
+ZLIB = "z"
+RAW = "r"
+
+
+def encode_text(value: str, threshold: int, level: int = 6) -> str:
+    if value.startswith(MARKER):
+        return MARKER + RAW + value
+    if not threshold or len(value) < threshold:
+        return value
+    packed = MARKER + ZLIB + base64.b85encode(zlib.compress(value.encode("utf-8"), level)).decode("ascii")
+    # Short or already-dense text can grow after encoding; keep it plain then
+    return packed if len(packed) < len(value) else value
+
+
+def decode_text(value: str) -> str:
+    if not value.startswith(MARKER):
+        return value
+    kind = value[1:2]
+    if kind == ZLIB:
+        return zlib.decompress(base64.b85decode(value[2:])).decode("utf-8")
+    if kind == RAW:
+        return value[2:]
+    raise ValueError(f"Unknown stored text format {kind!r}")
+
+
+class CompressedText(TypeDecorator):
+    """Text column that compresses values of note_compression_threshold characters or more.
+
+    The database sees ordinary text, so SQL functions (length, substr, LIKE) see the
+    encoded form for compressed rows; use ``is_compressed`` to tell them apart.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return encode_text(value, settings.note_compression_threshold, settings.note_compression_level)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decode_text(value)
+
+
+def is_compressed(column):
+    """SQL condition for rows whose stored value is not plain text (compressed or escaped)."""
+    return func.substr(type_coerce(column, Text), 1, 1) == MARKER
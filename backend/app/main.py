@@ -1,6 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import auth_router, notes_router, admin_router
+from app.core.hashing import HashPoolSaturated
+from app.core.redis import close_redis
+from app.core.security import configure_password_hashing, hash_pool
+from app.db.session import async_engine, engine
+from app.services import user_cache
+from app.services.audit_buffer import audit_buffer
+from app.services.email import mail_queue
+from app.services.audit_retention import ensure_partitions
 
 app = FastAPI(
     title="Notes App API",
@@ -17,6 +26,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include routers
@@ -24,6 +34,41 @@ app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(notes_router, prefix="/notes", tags=["Notes"])
 app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
+@app.exception_handler(HashPoolSaturated)
+async def hash_pool_saturated(request: Request, exc: HashPoolSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many authentication requests, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.on_event("startup")
+def start_user_cache_listener():
+    user_cache.start_listener()
+
+
+@app.on_event("startup")
+def calibrate_password_hashing():
+    configure_password_hashing()
+
+
+@app.on_event("startup")
+def create_audit_partitions():
+    with engine.begin() as connection:
+        ensure_partitions(connection)
+
+
+@app.on_event("shutdown")
+async def dispose_engine():
+    user_cache.stop_listener()
+    audit_buffer.stop()
+    mail_queue.stop()
+    hash_pool.shutdown()
+    close_redis()
+    await async_engine.dispose()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Notes App API"}
@@ -1,5 +1,9 @@
 from .user import User
+from .user_stats import UserStats
 from .note import Note, Visibility
 from .audit_log import AuditLog
+from .audit_activity import AuditActivity
+from .tag import Tag, note_tags
+from .note_revision import NoteRevision
 
 from app.db.session import Base
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String
+from app.db.session import Base
+from app.db.types import Timestamp
+
+
+class AuditActivity(Base):
+    """How many audit events of an action happened in an hour, per actor and overall.
+
+    Kept up to date as audit events are written; ``actor_id`` 0 is the total over
+    every actor (including anonymous events).
+    """
+    __tablename__ = "audit_activity"
+
+    bucket = Column(Timestamp, primary_key=True)  # Start of the hour, UTC
+    action = Column(String, primary_key=True)
+    actor_id = Column(Integer, primary_key=True, default=0)
+    count = Column(Integer, nullable=False, default=0)
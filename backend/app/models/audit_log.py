@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy import Column, Index, Integer, String, Text, JSON
 from sqlalchemy.sql import func
 from app.db.session import Base
+from app.db.types import Timestamp
 
 
 class AuditLog(Base):
+    # On Postgres the table is partitioned by month of created_at (migration 007)
     __tablename__ = "audit_logs"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -14,4 +16,12 @@ class AuditLog(Base):
     ip = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
     payload = Column(JSON, nullable=True)  # Additional data
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now(), index=True)  # UTC; without a zone on Postgres (migration 007)
+
+    __table_args__ = (
+        # Filtered, newest-first keyset pages of the admin audit log
+        Index("ix_audit_logs_actor_created_id", "actor_id", "created_at", "id"),
+        Index("ix_audit_logs_action_created_id", "action", "created_at", "id"),
+        Index("ix_audit_logs_target_created_id", "target_type", "target_id", "created_at", "id"),
+        Index("ix_audit_logs_ip_created_id", "ip", "created_at", "id"),
+    )
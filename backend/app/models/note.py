@@ -1,8 +1,22 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Index, DDL, event
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 from app.db.session import Base
+from app.db.types import Timestamp, CompressedText
+
+
+PREVIEW_LENGTH = 200
+
+
+def content_summary(content: str) -> dict:
+    """The stored length and preview columns for ``content``.
+
+    Kept next to the body so listings never have to read (or decompress) it. ORM
+    assignments fill them in through ``Note.summarize_content``; statements that
+    write ``content`` directly must add these values themselves.
+    """
+    return {"content_length": len(content), "content_preview": content[:PREVIEW_LENGTH]}
 
 
 class Visibility(enum.Enum):
@@ -16,12 +30,53 @@ class Note(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    content = Column(Text, nullable=False)
+    content = Column(CompressedText, nullable=False)
     visibility = Column(Enum(Visibility), default=Visibility.private)
     is_draft = Column(Boolean, default=False)
     tags = Column(String)  # Comma-separated tags
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every edit
+    content_length = Column(Integer, nullable=False, default=0, server_default="0")
+    content_preview = Column(String, nullable=False, default="", server_default="")
 
     author = relationship("User")
+
+    @validates("content")
+    def summarize_content(self, key, content):
+        if content is not None:
+            for name, value in content_summary(content).items():
+                setattr(self, name, value)
+        return content
+
+    @property
+    def is_in_public_feed(self) -> bool:
+        # visibility may still be the raw string assigned from a request schema
+        return self.visibility in (Visibility.public, Visibility.public.value) and not self.is_draft
+
+    __table_args__ = (
+        # Keyset pagination of the public feed and of a user's own notes
+        Index("ix_notes_visibility_draft_created_id", "visibility", "is_draft", "created_at", "id"),
+        Index("ix_notes_author_created_id", "author_id", "created_at", "id"),
+    )
+
+
+# Full-text index: an FTS5 shadow table on SQLite, a tsvector column with a GIN
+# index on Postgres. Both are maintained by app.services.search, not by triggers.
+event.listen(
+    Note.__table__, "after_create",
+    DDL("CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(title, content, tokenize='porter unicode61')")
+    .execute_if(dialect="sqlite")
+)
+event.listen(
+    Note.__table__, "after_drop",
+    DDL("DROP TABLE IF EXISTS notes_fts").execute_if(dialect="sqlite")
+)
+event.listen(
+    Note.__table__, "after_create",
+    DDL(
+        "ALTER TABLE notes ADD COLUMN IF NOT EXISTS search_vector tsvector; "
+        "CREATE INDEX IF NOT EXISTS ix_notes_search_vector ON notes USING gin (search_vector)"
+    ).execute_if(dialect="postgresql")
+)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, UniqueConstraint
+from app.db.session import Base
+from app.db.types import Timestamp, CompressedText
+
+
+class NoteRevision(Base):
+    """A superseded version of a note.
+
+    ``data`` is the full content when ``is_snapshot``, otherwise a reverse delta that
+    rebuilds this version from the next newer revision (or the note itself).
+    """
+    __tablename__ = "note_revisions"
+
+    id = Column(Integer, primary_key=True)
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    data = Column(CompressedText, nullable=False)
+    saved_at = Column(Timestamp)  # When this version was written
+
+    __table_args__ = (
+        UniqueConstraint("note_id", "version", name="uq_note_revisions_note_version"),
+    )
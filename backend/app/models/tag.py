@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Index
+from app.db.session import Base
+
+
+note_tags = Table(
+    "note_tags",
+    Base.metadata,
+    Column("note_id", Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key serves note -> tags; this one serves tag -> notes filtering
+    Index("ix_note_tags_tag_id_note_id", "tag_id", "note_id"),
+)
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)  # Normalized (lowercase)
+    note_count = Column(Integer, nullable=False, default=0)  # All notes carrying the tag
+    public_count = Column(Integer, nullable=False, default=0)  # Public, non-draft notes
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, DDL, event
 from sqlalchemy.sql import func
 from app.db.session import Base
+from app.db.types import Timestamp
 
 
 class User(Base):
@@ -13,5 +14,25 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     verification_token = Column(String, nullable=True)
     role = Column(String, default="user")  # "user" or "admin"
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Keyset pages of the admin user directory
+        Index("ix_users_created_id", "created_at", "id"),
+        # Case-insensitive email prefix search; text_pattern_ops lets Postgres use it for LIKE 'abc%'
+        Index(
+            "ix_users_email_lower", func.lower(email).label("email_lower"),
+            postgresql_ops={"email_lower": "text_pattern_ops"},
+        ),
+    )
+
+
+# Substring search on Postgres goes through a trigram index; SQLite scans instead
+event.listen(
+    User.__table__, "after_create",
+    DDL(
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm; "
+        "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (lower(email) gin_trgm_ops)"
+    ).execute_if(dialect="postgresql")
+)
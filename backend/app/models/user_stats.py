@@ -0,0 +1,81 @@
+from collections import Counter
+from sqlalchemy import Boolean, Column, Integer, String, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from app.db.session import Base
+from app.models.user import User
+
+
+class UserStats(Base):
+    """How many users have each combination of role, active and verified flags.
+
+    Adjusted in the same flush as every ORM insert, update and delete of a user, so
+    the admin directory can total any filter combination without counting ``users``.
+    """
+    __tablename__ = "user_stats"
+
+    role = Column(String, primary_key=True)
+    is_active = Column(Boolean, primary_key=True)
+    is_verified = Column(Boolean, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+def _key(role, is_active, is_verified) -> tuple:
+    # Matches the column defaults of User, which may not be applied to the instance yet
+    return (role or "user", True if is_active is None else bool(is_active), bool(is_verified))
+
+
+def _current(user: User) -> tuple:
+    return _key(user.role, user.is_active, user.is_verified)
+
+
+def _previous(user: User) -> tuple:
+    state = inspect(user)
+    values = []
+    for name in ("role", "is_active", "is_verified"):
+        history = state.attrs[name].history
+        values.append(history.deleted[0] if history.deleted else getattr(user, name))
+    return _key(*values)
+
+
+def adjust_user_stats(connection, deltas: Counter):
+    """Add ``{(role, is_active, is_verified): delta}`` to the counters, in key order."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(UserStats)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["role", "is_active", "is_verified"],
+        set_={"count": UserStats.count + stmt.excluded["count"]},
+    )
+    connection.execute(stmt, [
+        {"role": role, "is_active": is_active, "is_verified": is_verified, "count": delta}
+        for (role, is_active, is_verified), delta in sorted(deltas.items())
+    ])
+
+
+def _load_old_value(user, value, oldvalue, initiator):
+    pass
+
+
+# Load the old value of an expired attribute before it is overwritten, so that
+# after_update knows which counter to take the user out of
+for _attribute in (User.role, User.is_active, User.is_verified):
+    event.listen(_attribute, "set", _load_old_value, active_history=True)
+
+
+@event.listens_for(User, "after_insert")
+def _count_insert(mapper, connection, user):
+    adjust_user_stats(connection, Counter({_current(user): 1}))
+
+
+@event.listens_for(User, "after_update")
+def _count_update(mapper, connection, user):
+    before, after = _previous(user), _current(user)
+    if before != after:
+        adjust_user_stats(connection, Counter({before: -1, after: 1}))
+
+
+@event.listens_for(User, "after_delete")
+def _count_delete(mapper, connection, user):
+    adjust_user_stats(connection, Counter({_previous(user): -1}))
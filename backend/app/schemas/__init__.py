@@ -1,4 +1,6 @@
-from .user import User, UserCreate, UserUpdate
-from .note import Note, NoteCreate, NoteUpdate, NoteList
+from .user import User, UserCreate, UserUpdate, UserList
+from .note import Note, NoteCreate, NoteUpdate, NoteList, NoteSearchResult, NoteSummary, NoteBulkRequest, NoteBulkResponse, NoteImportJob, NotePatch, NoteVersion, NoteRevisionInfo, NoteRevision
 from .auth import Token, LoginRequest, RegisterRequest, PasswordResetRequest, PasswordResetConfirm, EmailVerificationRequest
-from .audit_log import AuditLog, AuditLogList
+from .audit_log import AuditLog, AuditLogList, ActivityStats
+from .tag import TagCount
+from .job import Job
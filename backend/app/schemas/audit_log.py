@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 
@@ -32,3 +32,22 @@ class AuditLog(AuditLogInDB):
 class AuditLogList(BaseModel):
     logs: list[AuditLog]
     total: int
+
+
+class ActivityBucket(BaseModel):
+    bucket: datetime
+    counts: Dict[str, int]
+
+
+class ActorActivity(BaseModel):
+    actor_id: int
+    total: int
+    counts: Dict[str, int]
+
+
+class ActivityStats(BaseModel):
+    since: datetime
+    until: datetime
+    granularity: str
+    series: List[ActivityBucket]
+    top_actors: List[ActorActivity]
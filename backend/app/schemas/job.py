@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: str
+    processed: int
+    succeeded: int
+    failed: int
+    errors: List[str] = []
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
 from datetime import datetime
 
 
@@ -26,6 +26,7 @@ class NoteUpdate(BaseModel):
 class Note(NoteBase):
     id: int
     author_id: int
+    version: int = 1
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -33,6 +34,94 @@ class Note(NoteBase):
         from_attributes = True
 
 
+class NoteSummary(BaseModel):
+    id: int
+    title: str
+    tags: Optional[str] = None
+    visibility: str
+    is_draft: bool = False
+    author_id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: int = 1
+    content_preview: str
+    content_length: int
+
+
 class NoteList(BaseModel):
     notes: List[Note]
     total: int
+
+
+class NoteSearchResult(Note):
+    rank: float
+    snippet: Optional[str] = None
+
+
+class NoteBulkOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None  # update, delete
+    version: Optional[int] = None  # update, delete: fail with 409 unless the note is at this version
+    note: Optional[NoteCreate] = None  # create
+    changes: Optional[NoteUpdate] = None  # update
+
+
+class NoteBulkRequest(BaseModel):
+    operations: List[NoteBulkOperation] = Field(..., max_length=1000)
+    atomic: bool = True  # All-or-nothing; False applies every operation that passes its checks
+
+
+class NoteBulkResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: Optional[int] = None
+    version: Optional[int] = None
+    error: Optional[str] = None
+
+
+class NoteBulkResponse(BaseModel):
+    committed: bool
+    results: List[NoteBulkResult]
+
+
+class NoteImportJob(BaseModel):
+    id: str
+    status: str
+    processed: int
+    imported: int
+    failed: int
+    errors: List[str] = []
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class NoteTextOp(BaseModel):
+    op: Literal["insert", "delete"]
+    pos: int = Field(..., ge=0)  # Offset into the base text, in characters
+    text: Optional[str] = None  # insert
+    length: Optional[int] = Field(None, ge=0)  # delete
+
+
+class NotePatch(BaseModel):
+    base_version: int
+    ops: Optional[List[NoteTextOp]] = Field(None, max_length=10000)  # Sorted by pos, non-overlapping
+    diff: Optional[str] = None  # Unified diff of the content; one of ops or diff
+
+
+class NoteVersion(BaseModel):
+    id: int
+    version: int
+
+
+class NoteRevisionInfo(BaseModel):
+    version: int
+    title: str
+    saved_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class NoteRevision(NoteRevisionInfo):
+    content: str
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class TagCount(BaseModel):
+    name: str
+    count: int
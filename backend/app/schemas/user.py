@@ -31,3 +31,8 @@ class UserInDB(UserBase):
 
 class User(UserInDB):
     pass
+
+
+class UserList(BaseModel):
+    users: list[User]
+    total: Optional[int] = None  # Not repeated on later pages of an email search
@@ -1,3 +1,3 @@
 from .auth import authenticate_user, create_user, verify_email, create_password_reset_token, reset_password, create_tokens, refresh_access_token, logout
 from .email import send_verification_email, send_password_reset_email
-from .audit import log_action, get_audit_logs, get_audit_logs_count
+from .audit import log_action, log_actions, get_audit_logs, get_audit_logs_count
@@ -0,0 +1,110 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Sequence
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.audit_activity import AuditActivity
+
+
+ALL_ACTORS = 0
+GRANULARITIES = ("hour", "day")
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def hour_bucket(moment: Optional[datetime]) -> datetime:
+    return _naive_utc(moment or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+
+
+def add_activity(db: Session, events: Iterable[dict]):
+    """Count audit events into the hourly rollups, in the caller's transaction.
+
+    Each event adds to its actor's row and to the all-actors row; rows are upserted
+    in key order so concurrent writers lock them in the same order.
+    """
+    counts = Counter()
+    for event in events:
+        key = (hour_bucket(event.get("created_at")), event["action"])
+        counts[key + (ALL_ACTORS,)] += 1
+        if event.get("actor_id"):
+            counts[key + (event["actor_id"],)] += 1
+    if not counts:
+        return
+    dialect = db.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(AuditActivity)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["bucket", "action", "actor_id"],
+        set_={"count": AuditActivity.count + stmt.excluded["count"]},
+    )
+    db.execute(stmt, [
+        {"bucket": bucket, "action": action, "actor_id": actor_id, "count": count}
+        for (bucket, action, actor_id), count in sorted(counts.items())
+    ])
+
+
+def _truncate(db: Session, granularity: str):
+    if granularity == "hour":
+        return AuditActivity.bucket
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("day", AuditActivity.bucket)
+    return func.datetime(AuditActivity.bucket, "start of day")
+
+
+def _range(since: datetime, until: datetime, actions: Optional[Sequence[str]]) -> list:
+    # Hours that overlap the range, partly covered ones at either end included
+    conditions = [AuditActivity.bucket >= hour_bucket(since), AuditActivity.bucket < _naive_utc(until)]
+    if actions:
+        conditions.append(AuditActivity.action.in_(actions))
+    return conditions
+
+
+def activity_series(
+    db: Session, since: datetime, until: datetime, granularity: str = "day",
+    actions: Optional[Sequence[str]] = None, actor_id: int = ALL_ACTORS,
+) -> List[dict]:
+    """``[{"bucket", "counts": {action: n}}]`` per hour or day in [since, until), empty buckets left out."""
+    bucket = _truncate(db, granularity).label("bucket")
+    rows = db.execute(
+        select(bucket, AuditActivity.action, func.sum(AuditActivity.count))
+        .where(AuditActivity.actor_id == actor_id, *_range(since, until, actions))
+        .group_by(bucket, AuditActivity.action)
+        .order_by(bucket)
+    ).all()
+    series = {}
+    for moment, action, count in rows:
+        if isinstance(moment, str):
+            moment = datetime.fromisoformat(moment)
+        series.setdefault(moment, {})[action] = int(count)
+    return [{"bucket": moment, "counts": counts} for moment, counts in series.items()]
+
+
+def top_actors(
+    db: Session, since: datetime, until: datetime, actions: Optional[Sequence[str]] = None, limit: int = 20,
+) -> List[dict]:
+    """The most active actors in [since, until): ``[{"actor_id", "total", "counts": {action: n}}]``."""
+    total = func.sum(AuditActivity.count)
+    conditions = [AuditActivity.actor_id != ALL_ACTORS, *_range(since, until, actions)]
+    leaders = db.execute(
+        select(AuditActivity.actor_id, total.label("total"))
+        .where(*conditions)
+        .group_by(AuditActivity.actor_id)
+        .order_by(total.desc(), AuditActivity.actor_id)
+        .limit(limit)
+    ).all()
+    if not leaders:
+        return []
+    per_action = db.execute(
+        select(AuditActivity.actor_id, AuditActivity.action, total)
+        .where(AuditActivity.actor_id.in_([actor for actor, _ in leaders]), *conditions)
+        .group_by(AuditActivity.actor_id, AuditActivity.action)
+    ).all()
+    counts = {}
+    for actor, action, count in per_action:
+        counts.setdefault(actor, {})[action] = int(count)
+    return [{"actor_id": actor, "total": int(count), "counts": counts[actor]} for actor, count in leaders]
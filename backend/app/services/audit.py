@@ -1,7 +1,20 @@
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import event, func, insert, select, text
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.audit_log import AuditLog
 from app.schemas.audit_log import AuditLogCreate
-from typing import Optional
+from app.services.activity import add_activity
+from app.services.audit_buffer import audit_buffer
+from typing import List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "pending_audit_events"
+ROLLUP_KEY = "pending_activity_events"
+COMMITTED_ROLLUP_KEY = "committed_activity_events"
 
 
 def log_action(
@@ -14,17 +27,77 @@ def log_action(
     user_agent: Optional[str] = None,
     payload: Optional[dict] = None
 ):
-    audit_log = AuditLog(
-        actor_id=actor_id,
-        action=action,
-        target_type=target_type,
-        target_id=target_id,
-        ip=ip,
-        user_agent=user_agent,
-        payload=payload
-    )
-    db.add(audit_log)
-    db.commit()
+    """Record an audit event in the caller's transaction; it is kept only once the caller commits."""
+    _record(db, [{
+        "actor_id": actor_id,
+        "action": action,
+        "target_type": target_type,
+        "target_id": target_id,
+        "ip": ip,
+        "user_agent": user_agent,
+        "payload": payload,
+    }])
+
+
+def log_actions(db: Session, entries: List[AuditLogCreate]):
+    """Record many audit events in the caller's transaction (no commit)."""
+    _record(db, [entry.model_dump() for entry in entries])
+
+
+def _record(db: Session, rows: List[dict]):
+    if not rows:
+        return
+    if settings.audit_mode == "transactional":
+        db.execute(insert(AuditLog), rows)
+        # Every event also counts into the shared all-actors rollup row; upserting it
+        # here would hold that row's lock until the caller commits and serialize
+        # concurrent requests, so the rollups are counted in a short transaction after
+        db.info.setdefault(ROLLUP_KEY, []).extend(rows)
+        return
+    # Buffered: handed to the audit writer when the caller's commit succeeds. The time is
+    # naive UTC, like the column's server default; an aware value would be converted to the
+    # database session's zone on the way into a column without one
+    now = _naive_utc(datetime.now(timezone.utc))
+    db.info.setdefault(PENDING_KEY, []).extend(dict(row, created_at=now) for row in rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _hand_over_pending(session: Session):
+    rows = session.info.pop(PENDING_KEY, None)
+    if rows:
+        audit_buffer.put(rows)
+    events = session.info.pop(ROLLUP_KEY, None)
+    if events:
+        # Still holding the committed transaction's connection here; counted once it is released
+        session.info.setdefault(COMMITTED_ROLLUP_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _count_committed_activity(session: Session, transaction):
+    if transaction.parent is not None:
+        return
+    events = session.info.pop(COMMITTED_ROLLUP_KEY, None)
+    if events:
+        _count_activity(session.get_bind(), events)
+
+
+def _count_activity(bind, events: List[dict]):
+    # The audit rows are already committed; a failure here only leaves the rollups short
+    db = Session(bind=bind)
+    try:
+        add_activity(db, events)
+        db.commit()
+    except Exception:
+        logger.exception("Counting %s audit events into the activity rollups failed", len(events))
+        db.rollback()
+    finally:
+        db.close()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(ROLLUP_KEY, None)
 
 
 def get_audit_logs(db: Session, skip: int = 0, limit: int = 100):
@@ -33,3 +106,66 @@ def get_audit_logs(db: Session, skip: int = 0, limit: int = 100):
 
 def get_audit_logs_count(db: Session):
     return db.query(AuditLog).count()
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    # created_at is stored without a zone, in UTC
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def audit_log_filters(
+    actor_id: Optional[int] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[int] = None,
+    ip: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> list:
+    """WHERE conditions for the given filters; each equality filter has a (column, created_at, id) index."""
+    conditions = []
+    if actor_id is not None:
+        conditions.append(AuditLog.actor_id == actor_id)
+    if action is not None:
+        conditions.append(AuditLog.action == action)
+    if target_type is not None:
+        conditions.append(AuditLog.target_type == target_type)
+    if target_id is not None:
+        conditions.append(AuditLog.target_id == target_id)
+    if ip is not None:
+        conditions.append(AuditLog.ip == ip)
+    if since is not None:
+        conditions.append(AuditLog.created_at >= _naive_utc(since))
+    if until is not None:
+        conditions.append(AuditLog.created_at < _naive_utc(until))
+    return conditions
+
+
+def estimate_audit_log_count(db: Session) -> int:
+    """Row count without scanning the table.
+
+    Postgres: the planner's estimate, summed over partitions. SQLite: the span of
+    ids, exact as long as rows are only ever removed oldest first (as retention does).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # The table itself when it is a plain table, its partitions when it is partitioned
+        estimate, least = db.execute(text(
+            "SELECT sum(c.reltuples), min(c.reltuples) FROM pg_class c "
+            "WHERE (c.oid = 'audit_logs'::regclass AND c.relkind = 'r') "
+            "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'audit_logs'::regclass)"
+        )).one()
+        # reltuples is -1 until a table has been analyzed
+        if least is not None and least >= 0:
+            return int(estimate)
+        return db.scalar(select(func.count()).select_from(AuditLog))
+    low, high = db.execute(select(func.min(AuditLog.id), func.max(AuditLog.id))).one()
+    return high - low + 1 if high is not None else 0
+
+
+def count_audit_logs(db: Session, conditions: list) -> int:
+    """Exact count of the rows matching ``conditions``; an estimate when there are none."""
+    if not conditions:
+        return estimate_audit_log_count(db)
+    return db.scalar(select(func.count()).select_from(AuditLog).where(*conditions))
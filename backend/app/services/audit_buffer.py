@@ -0,0 +1,170 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.audit_log import AuditLog
+from app.services.activity import add_activity
+
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """Committed audit events waiting to be written, flushed in bulk from a background thread.
+
+    Each batch also updates the hourly activity rollups, in the same commit.
+
+    A batch is written once ``batch_size`` events are waiting or every
+    ``flush_interval`` seconds, whichever comes first, with one multi-row INSERT.
+    Events beyond ``max_rows`` are dropped and counted rather than blocking requests;
+    a batch that fails to write is put back and retried on the next flush. After
+    ``max_attempts`` failures in a row it is written in halves, down to single rows,
+    so one bad event cannot hold up the rest; events that still fail are dropped.
+    """
+
+    def __init__(
+        self, batch_size: int, flush_interval: float, max_rows: int, max_attempts: int = 3,
+        session_factory: Callable[[], Session] = SessionLocal, autostart: bool = True,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.max_attempts = max_attempts
+        self._session_factory = session_factory
+        self.autostart = autostart  # Start the writer thread with the first event
+        self._rows: Deque[dict] = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self._attempts = 0  # Consecutive failures of the batch at the head of the queue
+        self.last_flush_ms = 0.0
+
+    def put(self, rows: List[dict]):
+        with self._cond:
+            room = self.max_rows - len(self._rows)
+            if room < len(rows):
+                self.dropped += len(rows) - max(room, 0)
+                rows = rows[:max(room, 0)]
+            self._rows.extend(rows)
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify()
+        if self.autostart and self._thread is None:
+            self.start()
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the writer thread and write whatever is still waiting."""
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping.set()
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            with self._cond:
+                if len(self._rows) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+            if not self.flush():
+                # The database is unavailable; wait before retrying instead of spinning
+                self._stopping.wait(self.flush_interval)
+
+    def flush(self) -> bool:
+        """Write every waiting event, a batch at a time; False if a batch failed."""
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+                if not batch:
+                    return True
+                if not self._write(batch):
+                    return False
+
+    def _write(self, batch: List[dict]) -> bool:
+        if self._commit(batch):
+            self._attempts = 0
+            return True
+        with self._cond:
+            self.failed_batches += 1
+            self._attempts += 1
+            if self._attempts < self.max_attempts:
+                logger.warning("Writing %s audit events failed; retrying later", len(batch))
+                self._rows.extendleft(reversed(batch))
+                while len(self._rows) > self.max_rows:
+                    self._rows.pop()
+                    self.dropped += 1
+                return False
+            self._attempts = 0
+        logger.error("Writing %s audit events failed %s times; writing them in halves", len(batch), self.max_attempts)
+        self._isolate(batch)
+        return True
+
+    def _isolate(self, batch: List[dict]):
+        """Write ``batch`` in halves, recursively, dropping the single events that fail."""
+        if len(batch) == 1:
+            logger.error("Dropping audit event that cannot be written: %r", batch[0])
+            with self._cond:
+                self.dropped += 1
+            return
+        middle = len(batch) // 2
+        for half in (batch[:middle], batch[middle:]):
+            if not self._commit(half):
+                self._isolate(half)
+
+    def _commit(self, batch: List[dict]) -> bool:
+        start = time.perf_counter()
+        db = self._session_factory()
+        try:
+            db.execute(insert(AuditLog), batch)
+            add_activity(db, batch)
+            db.commit()
+        except Exception:
+            logger.exception("Audit write of %s events failed", len(batch))
+            db.rollback()
+            return False
+        finally:
+            db.close()
+        self.written += len(batch)
+        self.batches += 1
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 3)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._rows),
+            "max_rows": self.max_rows,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+audit_buffer = AuditBuffer(
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_ms / 1000,
+    max_rows=settings.audit_buffer_max_rows,
+    max_attempts=settings.audit_batch_attempts,
+)
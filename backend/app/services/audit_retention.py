@@ -0,0 +1,149 @@
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.audit_log import AuditLog
+from app.services.audit import log_action
+from app.services.jobs import Job, finish_job, save_job, start_job
+
+
+logger = logging.getLogger(__name__)
+
+# On Postgres audit_logs is partitioned by month (see migration 007): audit_logs_y2026m10
+# holds October 2026 and audit_logs_default catches anything without a partition. SQLite
+# has no partitions, so there a month is simply a created_at range of the one table.
+PARTITION_PREFIX = "audit_logs_y"
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y}m{month:%m}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.scalar(text("SELECT relkind FROM pg_class WHERE relname = 'audit_logs'")) == "p"
+
+
+def ensure_partitions(connection: Connection, now: Optional[datetime] = None) -> List[str]:
+    """Create the monthly partitions from this month to ``audit_partition_months_ahead`` ahead.
+
+    A no-op unless audit_logs is partitioned. A month whose rows already went to the
+    default partition cannot get its own partition any more and is skipped.
+    """
+    if not is_partitioned(connection):
+        return []
+    created = []
+    month = month_start(now or datetime.now(timezone.utc))
+    for offset in range(settings.audit_partition_months_ahead + 1):
+        start = add_months(month, offset)
+        name = partition_name(start)
+        if connection.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF audit_logs "
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{add_months(start, 1):%Y-%m-%d}')"
+                ))
+            created.append(name)
+        except Exception as e:
+            logger.warning("Could not create audit partition %s: %s", name, e)
+    return created
+
+
+def expired_months(db: Session, cutoff: datetime) -> List[datetime]:
+    """Months, oldest first, whose audit rows are all older than ``cutoff``."""
+    oldest = db.scalar(select(func.min(AuditLog.created_at)))
+    months = []
+    month = month_start(oldest) if oldest is not None else cutoff
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def archive_month(db: Session, month: datetime, directory: str) -> int:
+    """Write one month of audit rows to a gzipped NDJSON file and remove them; returns the row count.
+
+    Runs in the caller's transaction. The file is complete before anything is
+    removed, and each run writes a new file, so a retried month never overwrites
+    an earlier archive.
+    """
+    end = add_months(month, 1)
+    in_month = (AuditLog.created_at >= month, AuditLog.created_at < end)
+    table = AuditLog.__table__
+    rows = db.execute(
+        select(table).where(*in_month).order_by(table.c.id).execution_options(yield_per=1000)
+    )
+    count = 0
+    path = os.path.join(directory, f"audit_logs_{month:%Y-%m}_{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.ndjson.gz")
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(row._mapping), default=str, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    if count:
+        os.replace(tmp_path, path)
+    else:
+        os.unlink(tmp_path)
+    if is_partitioned(db.connection()):
+        db.execute(text(f"DROP TABLE IF EXISTS {partition_name(month)}"))
+    # Rows of the month outside its partition (or the whole month on SQLite)
+    db.execute(delete(AuditLog).where(*in_month))
+    return count
+
+
+def archive_audit_logs(job: Job, now: Optional[datetime] = None):
+    """Move audit history older than ``audit_retention_months`` to archive files, a month at a time.
+
+    Nothing is archived while the retention is 0. Each month is committed on its own; on Postgres its partition is dropped rather
+    than deleted row by row. Partitions for the coming months are created first.
+    """
+    db = SessionLocal()
+    start_job(job)
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -settings.audit_retention_months)
+    try:
+        ensure_partitions(db.connection(), now)
+        db.commit()
+        months = expired_months(db, cutoff) if settings.audit_retention_months else []
+        if months:
+            os.makedirs(settings.audit_archive_dir, exist_ok=True)
+        for month in months:
+            rows = archive_month(db, month, settings.audit_archive_dir)
+            db.commit()
+            job.processed += 1
+            job.succeeded += rows
+            save_job(job)
+        finish_job(job, "completed")
+    except Exception as e:
+        logger.exception("Audit archival %s failed", job.id)
+        db.rollback()
+        job.errors.append(f"stopped: {e}")
+        finish_job(job, "failed")
+    finally:
+        try:
+            log_action(
+                db, "archive_audit_logs", actor_id=job.owner_id,
+                payload={"job_id": job.id, "status": job.status, "months": job.processed, "archived": job.succeeded},
+            )
+            db.commit()
+        finally:
+            db.close()
@@ -1,91 +1,130 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from app.core.security import verify_password_and_update, verify_password_and_update_async, get_password_hash, create_access_token, create_refresh_token
 from app.schemas.auth import Token
 from app.services.email import send_verification_email, send_password_reset_email
 from app.core.config import settings
+from app.core.kv import get_kv
 import secrets
-import redis
 import json
-
-
-redis_client = redis.from_url(settings.redis_url)
+from typing import Optional
 
 
 def authenticate_user(db: Session, email: str, password: str) -> User | None:
     user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
+        return None
+    verified, new_hash = verify_password_and_update(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Stored with another bcrypt cost than the calibrated one; upgrade (or downgrade) it
+        user.hashed_password = new_hash
+        db.commit()
     return user
 
 
-def create_user(db: Session, email: str, password: str) -> User:
-    hashed_password = get_password_hash(password)
-    verification_token = secrets.token_urlsafe(32)
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> User | None:
+    """``authenticate_user`` for async handlers; bcrypt waits in the hashing pool, not on the event loop."""
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user:
+        return None
+    verified, new_hash = await verify_password_and_update_async(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
+
+def add_user(db: Session, email: str, hashed_password: str) -> User:
+    """Insert an unverified user; hashing and the verification email are up to the caller."""
     user = User(
         email=email,
         hashed_password=hashed_password,
         is_verified=False,
-        verification_token=verification_token
+        verification_token=secrets.token_urlsafe(32)
     )
     db.add(user)
     db.commit()
     db.refresh(user)
-    send_verification_email(user.email, verification_token)
     return user
 
 
-def verify_email(db: Session, token: str) -> bool:
+def create_user(db: Session, email: str, password: str) -> User:
+    user = add_user(db, email, get_password_hash(password))
+    send_verification_email(user.email, user.verification_token)
+    return user
+
+
+def verify_email(db: Session, token: str) -> Optional[int]:
+    """Mark the token's user verified and return their id, or None for an unknown token."""
     user = db.query(User).filter(User.verification_token == token).first()
     if not user:
-        return False
+        return None
     user.is_verified = True
     user.verification_token = None
     db.commit()
-    return True
+    return user.id
+
+
+def send_password_reset(user: User):
+    reset_token = secrets.token_urlsafe(32)
+    get_kv().setex(f"password_reset:{reset_token}", 3600, user.id)  # 1 hour
+    send_password_reset_email(user.email, reset_token)
 
 
 def create_password_reset_token(db: Session, email: str) -> bool:
     user = db.query(User).filter(User.email == email).first()
     if not user:
         return False
-    reset_token = secrets.token_urlsafe(32)
-    redis_client.setex(f"password_reset:{reset_token}", 3600, user.id)  # 1 hour
-    send_password_reset_email(user.email, reset_token)
+    send_password_reset(user)
     return True
 
 
+def password_reset_user_id(token: str) -> int | None:
+    user_id = get_kv().get(f"password_reset:{token}")
+    return int(user_id) if user_id else None
+
+
+def clear_password_reset(token: str):
+    get_kv().delete(f"password_reset:{token}")
+
+
 def reset_password(db: Session, token: str, new_password: str) -> bool:
-    user_id = redis_client.get(f"password_reset:{token}")
+    user_id = password_reset_user_id(token)
     if not user_id:
         return False
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = db.query(User).filter(User.id == user_id).first()
     if not user:
         return False
     user.hashed_password = get_password_hash(new_password)
     db.commit()
-    redis_client.delete(f"password_reset:{token}")
+    clear_password_reset(token)
     return True
 
 
 def create_tokens(user: User) -> Token:
     access_token = create_access_token(subject=user.id)
     refresh_token = create_refresh_token(subject=user.id)
-    # Store refresh token in Redis
-    redis_client.setex(f"refresh:{user.id}", settings.refresh_token_expire_days * 24 * 3600, refresh_token)
+    get_kv().setex(f"refresh:{user.id}", settings.refresh_token_expire_days * 24 * 3600, refresh_token)
     return Token(access_token=access_token, refresh_token=refresh_token)
 
 
 def refresh_access_token(user_id: int, refresh_token: str) -> Token | None:
-    stored_token = redis_client.get(f"refresh:{user_id}")
-    if not stored_token or stored_token.decode() != refresh_token:
-        return None
-    # Rotate refresh token
     new_access_token = create_access_token(subject=user_id)
     new_refresh_token = create_refresh_token(subject=user_id)
-    redis_client.setex(f"refresh:{user_id}", settings.refresh_token_expire_days * 24 * 3600, new_refresh_token)
+    # Rotate only if the presented token is still the stored one, so a token can be redeemed once
+    rotated = get_kv().compare_and_set(
+        f"refresh:{user_id}", refresh_token, new_refresh_token, settings.refresh_token_expire_days * 24 * 3600
+    )
+    if not rotated:
+        return None
     return Token(access_token=new_access_token, refresh_token=new_refresh_token)
 
 
 def logout(user_id: int):
-    redis_client.delete(f"refresh:{user_id}")
+    get_kv().delete(f"refresh:{user_id}")
@@ -0,0 +1,143 @@
+from typing import List, Tuple
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+from app.models.note import Note, content_summary
+from app.schemas.audit_log import AuditLogCreate
+from app.schemas.note import NoteBulkOperation, NoteBulkResult
+from app.services.audit import log_actions
+from app.services.revisions import superseded, record_revisions, delete_revisions
+from app.services.search import index_notes, unindex_notes
+from app.services.tags import tag_state, apply_tag_changes
+from app.services import feed_cache
+
+
+def _check(index: int, item: NoteBulkOperation, existing: dict, seen: set, user) -> NoteBulkResult:
+    """Per-operation validation against the prefetched rows; status 0 means the operation may run."""
+    result = NoteBulkResult(index=index, op=item.op, status=0, id=item.id)
+    if item.op == "create":
+        if item.note is None:
+            result.status, result.error = 400, "create requires 'note'"
+        return result
+    if item.id is None:
+        result.status, result.error = 400, f"{item.op} requires 'id'"
+    elif item.op == "update" and item.changes is None:
+        result.status, result.error = 400, "update requires 'changes'"
+    elif item.id in seen:
+        result.status, result.error = 400, "Note appears more than once in the batch"
+    elif item.id not in existing:
+        result.status, result.error = 404, "Note not found"
+    elif existing[item.id].author_id != user.id and user.role != "admin":
+        result.status, result.error = 403, f"Not authorized to {item.op} this note"
+    elif item.version is not None and item.version != existing[item.id].version:
+        result.status, result.error = 409, "Note has changed"
+    seen.add(item.id)
+    return result
+
+
+def insert_notes(db: Session, rows: List[dict]) -> Tuple[List[int], bool]:
+    """Bulk insert notes and index them for search and tags, without committing.
+
+    Returns the new ids in row order and whether any of them is in the public feed.
+    """
+    rows = [dict(row, **content_summary(row["content"])) for row in rows]
+    new_ids = db.scalars(insert(Note).returning(Note.id, sort_by_parameter_order=True), rows).all()
+    notes = [Note(id=note_id, **row) for note_id, row in zip(new_ids, rows)]
+    index_notes(db, notes)
+    apply_tag_changes(db, [(note.id, None, tag_state(note)) for note in notes])
+    return new_ids, any(note.is_in_public_feed for note in notes)
+
+
+def apply_bulk(db: Session, operations: List[NoteBulkOperation], user, atomic: bool = True):
+    """Apply a batch of note creates, updates and deletes with a single commit.
+
+    Permissions are checked against one prefetch query; inserts and deletes go out
+    as bulk statements, while each update is a compare-and-set on the prefetched
+    version, so a note edited concurrently gets a 409 instead of being overwritten.
+    All audit rows are written with one insert. Returns
+    ``(committed, results)``; in atomic mode nothing is written if any
+    operation fails its checks.
+    """
+    ids = {item.id for item in operations if item.op != "create" and item.id is not None}
+    existing = {note.id: note for note in db.query(Note).filter(Note.id.in_(ids)).all()} if ids else {}
+    seen = set()
+    results = [_check(i, item, existing, seen, user) for i, item in enumerate(operations)]
+
+    if atomic and any(r.status for r in results):
+        for r in results:
+            if not r.status:
+                r.status, r.error = 424, "Not applied: another operation in the batch failed"
+        return False, results
+
+    ok = [(r, item) for r, item in zip(results, operations) if not r.status]
+    creates = [(r, item) for r, item in ok if item.op == "create"]
+    updates = [(r, item) for r, item in ok if item.op == "update"]
+    deletes = [(r, item) for r, item in ok if item.op == "delete"]
+    tag_changes, reindex, replaced, feed_touched = [], [], [], False
+
+    if creates:
+        rows = [dict(item.note.dict(), author_id=user.id) for _, item in creates]
+        new_ids, feed_touched = insert_notes(db, rows)
+        for (r, _), note_id in zip(creates, new_ids):
+            r.status, r.id, r.version = 201, note_id, 1
+
+    for r, item in updates:
+        current = existing[item.id]
+        changes = item.changes.dict(exclude_unset=True)
+        version = current.version + 1
+        summary = content_summary(changes["content"]) if "content" in changes else {}
+        # Compare-and-set against the prefetched version everything below is derived from
+        result = db.execute(
+            update(Note)
+            .where(Note.id == item.id, Note.version == current.version)
+            .values(**changes, **summary, version=version)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            r.status, r.error = 409, "Note has changed"
+            continue
+        after = Note(**{
+            column: changes.get(column, getattr(current, column))
+            for column in ("id", "title", "content", "visibility", "is_draft", "tags")
+        })
+        if "title" in changes or "content" in changes:
+            reindex.append(after)
+        replaced.append(superseded(current, after.content))
+        tag_changes.append((item.id, tag_state(current), tag_state(after)))
+        feed_touched |= current.is_in_public_feed or after.is_in_public_feed
+        r.status, r.version = 200, version
+
+    if atomic and any(r.status == 409 for r, _ in updates):
+        db.rollback()
+        for r in results:
+            if r.status < 300:
+                r.status, r.error, r.version = 424, "Not applied: another operation in the batch failed", None
+                if r.op == "create":
+                    r.id = None
+        return False, results
+    ok = [(r, item) for r, item in ok if r.status < 300]
+
+    for r, item in deletes:
+        current = existing[item.id]
+        tag_changes.append((item.id, tag_state(current), None))
+        feed_touched |= current.is_in_public_feed
+        r.status = 200
+
+    index_notes(db, reindex)
+    record_revisions(db, replaced)
+    apply_tag_changes(db, tag_changes)
+    if deletes:
+        delete_ids = [item.id for _, item in deletes]
+        unindex_notes(db, delete_ids)
+        delete_revisions(db, delete_ids)
+        db.execute(delete(Note).where(Note.id.in_(delete_ids)))
+    log_actions(db, [
+        AuditLogCreate(
+            actor_id=user.id, action=f"{item.op}_note", target_type="note", target_id=r.id,
+            payload={"bulk": True}
+        )
+        for r, item in ok
+    ])
+    db.commit()
+    if feed_touched:
+        feed_cache.invalidate()
+    return True, results
@@ -0,0 +1,81 @@
+import logging
+from sqlalchemy import Text, bindparam, select, type_coerce, update
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.types import decode_text, encode_text
+from app.models.note import Note
+from app.services.audit import log_action
+from app.services.jobs import Job, finish_job, save_job, start_job
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def _execute_counted(db, statement, params: list) -> int:
+    """Run ``statement`` for every parameter set and return how many rows it matched in total."""
+    if not params:
+        return 0
+    if db.get_bind().dialect.supports_sane_multi_rowcount:
+        return db.execute(statement, params).rowcount
+    return sum(db.execute(statement, row).rowcount for row in params)
+
+
+def recompress_notes(job: Job, batch_size: int = BATCH_SIZE):
+    """Re-encode every stored note body with the current compression settings.
+
+    Walks notes in id order, one committed chunk at a time, and only rewrites rows
+    whose stored form changes, so it can be rerun (or resumed) safely. Works in
+    both directions: raising the threshold decompresses rows again. A row edited
+    since it was read is left alone (and counted as skipped); the edit already
+    stored it with the current settings.
+    """
+    notes = Note.__table__
+    stored = type_coerce(notes.c.content, Text)
+    rewrite = (
+        update(notes)
+        .where(notes.c.id == bindparam("n_id"), stored == bindparam("old", type_=Text))
+        # Storage-only change: the body is bound as already-encoded text and updated_at is kept
+        .values(content=bindparam("stored", type_=Text), updated_at=notes.c.updated_at)
+    )
+    db = SessionLocal()
+    start_job(job)
+    last_id = skipped = 0
+    try:
+        while True:
+            rows = db.execute(
+                select(notes.c.id, stored).where(notes.c.id > last_id).order_by(notes.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            changed = []
+            for note_id, value in rows:
+                encoded = encode_text(decode_text(value), settings.note_compression_threshold, settings.note_compression_level)
+                if encoded != value:
+                    changed.append({"n_id": note_id, "old": value, "stored": encoded})
+            written = _execute_counted(db, rewrite, changed)
+            db.commit()
+            last_id = rows[-1][0]
+            job.processed += len(rows)
+            job.succeeded += written
+            skipped += len(changed) - written
+            save_job(job)
+        finish_job(job, "completed")
+    except Exception as e:
+        logger.exception("Recompression %s failed after note %s", job.id, last_id)
+        db.rollback()
+        job.errors.append(f"stopped after note {last_id}: {e}")
+        finish_job(job, "failed")
+    finally:
+        try:
+            log_action(
+                db, "recompress_notes", actor_id=job.owner_id,
+                payload={
+                    "job_id": job.id, "status": job.status, "processed": job.processed,
+                    "rewritten": job.succeeded, "skipped": skipped,
+                },
+            )
+            db.commit()
+        finally:
+            db.close()
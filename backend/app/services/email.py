@@ -1,23 +1,241 @@
 from app.core.config import settings
+import atexit
+import heapq
+import itertools
+import logging
 import smtplib
+import threading
+import time
+from dataclasses import dataclass, field
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingEmail:
+    to_email: str
+    subject: str
+    body: str
+    queued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+    def as_string(self) -> str:
+        msg = MIMEMultipart()
+        msg['From'] = settings.email_from
+        msg['To'] = self.to_email
+        msg['Subject'] = self.subject
+        msg.attach(MIMEText(self.body, 'html'))
+        return msg.as_string()
+
+
+class MailQueue:
+    """Outgoing email, delivered by background workers that each keep an SMTP connection open.
+
+    A worker takes up to ``batch_size`` due messages and sends them over its
+    connection, reconnecting when it drops and closing it after ``idle_timeout``
+    seconds without mail. Temporary failures are retried with exponential backoff
+    up to ``max_attempts``; messages the server rejects outright are not retried.
+    The queue lives in memory, so mail still queued when the process dies is lost.
+    """
+
+    def __init__(
+        self, workers: int, batch_size: int, max_attempts: int, retry_base: float, retry_max: float,
+        idle_timeout: float, max_queued: int,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.idle_timeout = idle_timeout
+        self.max_queued = max_queued
+        self._heap = []  # (due, sequence, email)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+        self._in_flight = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.connections_opened = 0
+        self.latency_seconds_total = 0.0
+        self.latency_seconds_max = 0.0
+
+    def put(self, email: OutgoingEmail, due: Optional[float] = None):
+        with self._cond:
+            if len(self._heap) >= self.max_queued:
+                self.dropped += 1
+                logger.error("Mail queue full, dropping email to %s", email.to_email)
+                return
+            heapq.heappush(self._heap, (due or time.monotonic(), next(self._sequence), email))
+            self._cond.notify()
+            start = not self._threads and not self._stopping
+        if start:
+            self.start()
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            self._threads = [
+                threading.Thread(target=self._run, name=f"mail-worker-{n}", daemon=True)
+                for n in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: float = 10.0):
+        """Deliver what is due within ``timeout`` seconds, then stop the workers."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._heap and self._heap[0][0] <= time.monotonic() or self._in_flight) and self._threads:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(min(remaining, 0.1))
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+            if self._heap:
+                logger.warning("Mail queue stopped with %s undelivered emails", len(self._heap))
+        for thread in threads:
+            thread.join(timeout=max(deadline - time.monotonic(), 0) + 1)
+
+    def _take(self, timeout: float) -> List[OutgoingEmail]:
+        """Up to batch_size due messages, waiting at most ``timeout`` seconds for the first."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._stopping:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    batch = []
+                    while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                        batch.append(heapq.heappop(self._heap)[2])
+                    self._in_flight += len(batch)
+                    return batch
+                wait = deadline - now
+                if self._heap:
+                    wait = min(wait, self._heap[0][0] - now)
+                if wait <= 0:
+                    return []
+                self._cond.wait(wait)
+            return []
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.smtp_server, settings.smtp_port, timeout=settings.smtp_timeout)
+        if settings.smtp_username:
+            server.login(settings.smtp_username, settings.smtp_password or "")
+        with self._cond:
+            self.connections_opened += 1
+        return server
+
+    @staticmethod
+    def _close(server: Optional[smtplib.SMTP]):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _retry_or_fail(self, email: OutgoingEmail, error: Exception, permanent: bool = False):
+        email.attempts += 1
+        if permanent or email.attempts >= self.max_attempts:
+            logger.error("Giving up on email to %s after %s attempts: %s", email.to_email, email.attempts, error)
+            with self._cond:
+                self.failed += 1
+            return
+        delay = min(self.retry_base * 2 ** (email.attempts - 1), self.retry_max)
+        logger.warning("Email to %s failed (%s), retrying in %ss", email.to_email, error, delay)
+        with self._cond:
+            self.retried += 1
+        self.put(email, due=time.monotonic() + delay)
+
+    def _run(self):
+        server = None
+        while True:
+            batch = self._take(self.idle_timeout)
+            if not batch:
+                self._close(server)
+                server = None
+                with self._cond:
+                    if self._stopping:
+                        return
+                continue
+            for index, email in enumerate(batch):
+                try:
+                    if server is None:
+                        server = self._connect()
+                    server.sendmail(settings.email_from, email.to_email, email.as_string())
+                except smtplib.SMTPResponseException as e:
+                    # 5xx is a final answer about this message; the connection is still usable
+                    self._retry_or_fail(email, e, permanent=500 <= e.smtp_code < 600)
+                    if e.smtp_code == 421:  # Service closing the channel
+                        self._close(server)
+                        server = None
+                except smtplib.SMTPRecipientsRefused as e:
+                    # Only a 5xx refusal is final; a 4xx one (e.g. greylisting) is retried
+                    codes = [code for code, _ in e.recipients.values()]
+                    self._retry_or_fail(email, e, permanent=bool(codes) and all(500 <= code < 600 for code in codes))
+                except (smtplib.SMTPException, OSError) as e:
+                    self._close(server)
+                    server = None
+                    self._retry_or_fail(email, e)
+                    # The rest of the batch goes back as it was and is retried on a new connection
+                    for rest in batch[index + 1:]:
+                        self.put(rest)
+                    with self._cond:
+                        self._in_flight -= len(batch) - index - 1
+                    batch = batch[:index + 1]
+                    break
+                else:
+                    latency = time.monotonic() - email.queued_at
+                    with self._cond:
+                        self.sent += 1
+                        self.latency_seconds_total += latency
+                        self.latency_seconds_max = max(self.latency_seconds_max, latency)
+            with self._cond:
+                self._in_flight -= len(batch)
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": len(self._heap),
+                "due": sum(1 for due, _, _ in self._heap if due <= time.monotonic()),
+                "in_flight": self._in_flight,
+                "sent": self.sent,
+                "retried": self.retried,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "connections_opened": self.connections_opened,
+                "latency_ms_avg": round(self.latency_seconds_total * 1000 / self.sent, 3) if self.sent else 0.0,
+                "latency_ms_max": round(self.latency_seconds_max * 1000, 3),
+            }
+
+
+mail_queue = MailQueue(
+    workers=settings.email_workers,
+    batch_size=settings.email_batch_size,
+    max_attempts=settings.email_max_attempts,
+    retry_base=settings.email_retry_base_seconds,
+    retry_max=settings.email_retry_max_seconds,
+    idle_timeout=settings.email_idle_timeout,
+    max_queued=settings.email_queue_max,
+)
 
 
 def send_email(to_email: str, subject: str, body: str):
-    msg = MIMEMultipart()
-    msg['From'] = settings.email_from
-    msg['To'] = to_email
-    msg['Subject'] = subject
-
-    msg.attach(MIMEText(body, 'html'))
-
-    try:
-        server = smtplib.SMTP(settings.smtp_server, settings.smtp_port)
-        server.sendmail(settings.email_from, to_email, msg.as_string())
-        server.quit()
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+    """Queue an email for background delivery; returns without touching the network."""
+    mail_queue.put(OutgoingEmail(to_email, subject, body))
 
 
 def send_verification_email(email: str, token: str):
@@ -0,0 +1,122 @@
+import io
+import json
+import re
+import zipfile
+from types import SimpleNamespace
+from typing import AsyncIterator
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Text, select, type_coerce
+from app.db.session import AsyncSessionLocal
+from app.db.types import decode_text
+from app.models.note import Note
+
+
+BATCH_SIZE = 500
+CHUNK_SIZE = 64 * 1024
+NDJSON_FIELDS = ("id", "title", "content", "visibility", "is_draft", "tags", "created_at", "updated_at")
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+async def _iter_batches(author_id: int) -> AsyncIterator[list]:
+    """The author's notes in id order, BATCH_SIZE rows at a time through a server-side cursor.
+
+    Bodies come back as stored (possibly compressed): inflating them is CPU work,
+    left to ``_decoded`` in a worker thread rather than done on the event loop.
+    """
+    columns = [type_coerce(Note.content, Text).label(field) if field == "content" else getattr(Note, field) for field in NDJSON_FIELDS]
+    async with AsyncSessionLocal() as db:
+        stmt = (
+            select(*columns)
+            .where(Note.author_id == author_id)
+            .order_by(Note.id)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        async for rows in (await db.stream(stmt)).partitions():
+            yield rows
+
+
+def _decoded(rows) -> list:
+    return [SimpleNamespace(**dict(row._mapping, content=decode_text(row.content))) for row in rows]
+
+
+def _plain(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+
+def _ndjson_lines(rows) -> bytes:
+    return b"".join(
+        (json.dumps({field: _plain(getattr(note, field)) for field in NDJSON_FIELDS}, ensure_ascii=False) + "\n").encode()
+        for note in _decoded(rows)
+    )
+
+
+async def iter_ndjson(author_id: int) -> AsyncIterator[bytes]:
+    """One JSON object per note and line. The first line is sent as soon as it is read, so
+    the download starts at once; after that lines go out in chunks of about CHUNK_SIZE bytes.
+    Each batch is decoded and serialized in a worker thread."""
+    chunk, size, first = [], 0, True
+    async for rows in _iter_batches(author_id):
+        if first:
+            first = False
+            yield await run_in_threadpool(_ndjson_lines, rows[:1])
+            rows = rows[1:]
+        lines = await run_in_threadpool(_ndjson_lines, rows)
+        chunk.append(lines)
+        size += len(lines)
+        if size >= CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    if chunk and size:
+        yield b"".join(chunk)
+
+
+def markdown_filename(note: Note) -> str:
+    slug = _SLUG_RE.sub("-", (note.title or "").lower()).strip("-")[:60] or "note"
+    return f"{note.id:06d}-{slug}.md"
+
+
+def to_markdown(note: Note) -> str:
+    front_matter = {field: _plain(getattr(note, field)) for field in NDJSON_FIELDS if field != "content"}
+    header = "\n".join(f"{key}: {json.dumps(value, ensure_ascii=False)}" for key, value in front_matter.items())
+    return f"---\n{header}\n---\n\n{note.content}\n"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable target for ZipFile; the archive is drained chunk by chunk."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _write_markdown(archive: zipfile.ZipFile, sink: _ChunkSink, rows) -> bytes:
+    for note in _decoded(rows):
+        archive.writestr(markdown_filename(note), to_markdown(note))
+    return sink.drain()
+
+
+async def iter_markdown_zip(author_id: int) -> AsyncIterator[bytes]:
+    """A ZIP of one Markdown file per note; each batch is decoded and deflated in a worker thread."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for rows in _iter_batches(author_id):
+            chunk = await run_in_threadpool(_write_markdown, archive, sink, rows)
+            if chunk:
+                yield chunk
+    yield sink.drain()
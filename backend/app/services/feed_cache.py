@@ -0,0 +1,104 @@
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+import redis
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "public_feed:page:"
+KEY_SET = "public_feed:keys"
+# Bumped by every invalidation and part of every page key, so a page built from data
+# read before an invalidation is stored where no later reader looks
+GENERATION_KEY = "public_feed:generation"
+
+
+@dataclass
+class FeedPage:
+    body: bytes
+    etag: str
+    next_cursor: Optional[str] = None
+
+    def pack(self) -> bytes:
+        return f"{self.etag}\n{self.next_cursor or ''}\n".encode() + self.body
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "FeedPage":
+        etag, next_cursor, body = data.split(b"\n", 2)
+        return cls(body=body, etag=etag.decode(), next_cursor=next_cursor.decode() or None)
+
+
+_local = LRUCache(maxsize=settings.public_feed_cache_size, ttl=settings.public_feed_cache_ttl)
+# The same for this worker's local tier: a page built before the latest bump is not cached
+_generation = itertools.count()
+_current_generation = next(_generation)
+
+
+def _redis_enabled() -> bool:
+    # With the memory KV backend there is no Redis server to share pages through
+    return settings.public_feed_cache_redis and settings.kv_backend == "redis"
+
+
+def page_key(**params) -> str:
+    return ":".join(f"{name}={params[name]}" for name in sorted(params))
+
+
+def get_or_build(key: str, build: Callable[[], FeedPage]) -> FeedPage:
+    """Serve a serialized feed page from the local LRU, then Redis, building it on a full miss.
+
+    A page whose build raced with ``invalidate`` is returned but not cached.
+    """
+    page = _local.get(key)
+    if page is not None:
+        return page
+    local_generation = _current_generation
+    redis_key = None
+    if _redis_enabled():
+        try:
+            client = get_redis()
+            redis_key = f"{KEY_PREFIX}{int(client.get(GENERATION_KEY) or 0)}:{key}"
+            data = client.get(redis_key)
+            if data is not None:
+                page = FeedPage.unpack(data)
+        except redis.RedisError as e:
+            logger.warning("Public feed cache read failed: %s", e)
+    if page is None:
+        page = build()
+        if redis_key is not None:
+            try:
+                pipe = get_redis().pipeline(transaction=False)
+                pipe.setex(redis_key, settings.public_feed_redis_ttl, page.pack())
+                pipe.sadd(KEY_SET, redis_key)
+                pipe.execute()
+            except redis.RedisError as e:
+                logger.warning("Public feed cache write failed: %s", e)
+    if local_generation == _current_generation:
+        _local.set(key, page)
+    return page
+
+
+def invalidate():
+    """Drop every cached feed page. Other workers' local tiers expire within public_feed_cache_ttl."""
+    global _current_generation
+    _current_generation = next(_generation)
+    _local.clear()
+    if _redis_enabled():
+        try:
+            client = get_redis()
+            client.incr(GENERATION_KEY)
+            keys = client.smembers(KEY_SET)
+            if keys:
+                pipe = client.pipeline(transaction=False)
+                pipe.delete(*keys)
+                pipe.srem(KEY_SET, *keys)
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Public feed cache invalidation failed: %s", e)
+
+
+def stats() -> dict:
+    return _local.stats()
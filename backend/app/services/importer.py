@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import zipfile
+from typing import Iterator, Optional, Tuple
+from pydantic import ValidationError
+from app.db.session import SessionLocal
+from app.models.note import Visibility
+from app.schemas.note import NoteCreate
+from app.services.audit import log_action
+from app.services.bulk import insert_notes
+from app.services.jobs import Job, finish_job, save_job, start_job
+from app.services import feed_cache
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MARKDOWN_SUFFIXES = (".md", ".markdown")
+MAX_MEMBER_SIZE = 10 * 1024 * 1024
+
+# (where the record came from, parsed record or the reason it could not be parsed)
+Record = Tuple[str, Optional[dict], Optional[str]]
+
+
+def iter_ndjson_records(path: str) -> Iterator[Record]:
+    """One JSON object per line, read a line at a time."""
+    with open(path, "rb") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield f"line {lineno}", None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield f"line {lineno}", None, "expected a JSON object"
+                continue
+            yield f"line {lineno}", record, None
+
+
+def parse_markdown(text: str, name: str) -> dict:
+    """Read a note written by ``export.to_markdown``, or a plain Markdown file.
+
+    Front matter values are JSON when they parse as JSON and plain strings otherwise.
+    Without a ``title`` the first ``#`` heading, then the file name, is used.
+    """
+    record = {}
+    if text.startswith("---\n"):
+        end = text.find("\n---\n", 3)
+        if end != -1:
+            for line in text[4:end].splitlines():
+                key, sep, value = line.partition(":")
+                if not sep:
+                    continue
+                value = value.strip()
+                try:
+                    record[key.strip()] = json.loads(value)
+                except ValueError:
+                    record[key.strip()] = value
+            text = text[end + 5:]
+            if text.startswith("\n"):
+                text = text[1:]
+            if text.endswith("\n"):
+                text = text[:-1]
+    if not record.get("title"):
+        first_line = text.lstrip().split("\n", 1)[0]
+        if first_line.startswith("# "):
+            record["title"] = first_line[2:].strip()
+        else:
+            record["title"] = os.path.splitext(os.path.basename(name))[0]
+    record["content"] = text
+    return record
+
+
+def iter_markdown_records(path: str) -> Iterator[Record]:
+    """Markdown members of a ZIP archive, decompressed one at a time."""
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(MARKDOWN_SUFFIXES):
+                continue
+            if info.file_size > MAX_MEMBER_SIZE:
+                yield info.filename, None, "file is too large"
+                continue
+            try:
+                text = archive.read(info).decode("utf-8")
+            except UnicodeDecodeError:
+                yield info.filename, None, "not valid UTF-8"
+                continue
+            yield info.filename, parse_markdown(text, info.filename), None
+
+
+def _to_row(record: dict, author_id: int) -> dict:
+    if isinstance(record.get("tags"), list):
+        record["tags"] = ",".join(str(tag) for tag in record["tags"])
+    note = NoteCreate(**{name: record[name] for name in NoteCreate.model_fields if record.get(name) is not None})
+    if note.visibility not in Visibility.__members__:
+        raise ValueError(f"invalid visibility: {note.visibility}")
+    return dict(note.dict(), author_id=author_id)
+
+
+def run_import(job: Job, path: str, format: str):
+    """Parse an uploaded file and insert its notes for the job owner, committing every BATCH_SIZE notes.
+
+    Runs after the response has been sent, with its own session; the upload is
+    deleted when done. One ``import_notes`` audit row summarizes the job.
+    """
+    records = iter_markdown_records(path) if format == "zip" else iter_ndjson_records(path)
+    db = SessionLocal()
+    batch, feed_touched = [], False
+
+    def flush():
+        nonlocal feed_touched
+        _, public = insert_notes(db, batch)
+        db.commit()
+        job.succeeded += len(batch)
+        save_job(job)
+        feed_touched |= public
+        batch.clear()
+
+    start_job(job)
+    try:
+        for source, record, error in records:
+            job.processed += 1
+            if error is None:
+                try:
+                    batch.append(_to_row(record, job.owner_id))
+                except ValidationError as e:
+                    error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                job.add_error(f"{source}: {error}")
+            if len(batch) >= BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+        finish_job(job, "completed")
+    except Exception as e:
+        logger.exception("Import %s failed", job.id)
+        db.rollback()
+        job.errors.append(f"import aborted: {e}")
+        finish_job(job, "failed")
+    finally:
+        os.unlink(path)
+        if feed_touched:
+            feed_cache.invalidate()
+        try:
+            log_action(
+                db, "import_notes", actor_id=job.owner_id,
+                payload={
+                    "job_id": job.id, "format": format, "status": job.status,
+                    "processed": job.processed, "imported": job.succeeded, "failed": job.failed,
+                },
+            )
+            db.commit()
+        finally:
+            db.close()
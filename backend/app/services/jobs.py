@@ -0,0 +1,75 @@
+import json
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.core.config import settings
+from app.core.kv import get_kv
+
+
+MAX_ERRORS = 50
+KEY_PREFIX = "job:"
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    owner_id: int
+    status: str = "pending"  # pending, running, completed, failed
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    errors: List[str] = field(default_factory=list)
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+    def add_error(self, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(message)
+
+    def pack(self) -> str:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        data["finished_at"] = self.finished_at.isoformat() if self.finished_at else None
+        return json.dumps(data)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "Job":
+        values = json.loads(data)
+        values["created_at"] = datetime.fromisoformat(values["created_at"])
+        if values["finished_at"]:
+            values["finished_at"] = datetime.fromisoformat(values["finished_at"])
+        return cls(**values)
+
+
+# Jobs run in the worker that accepted them, but their state lives in the KV store so
+# any worker can report it; it expires job_ttl seconds after the job's last save.
+
+
+def save_job(job: Job):
+    """Publish the job's current state; runners call this as they make progress."""
+    get_kv().setex(f"{KEY_PREFIX}{job.id}", settings.job_ttl, job.pack())
+
+
+def create_job(kind: str, owner_id: int) -> Job:
+    job = Job(id=uuid.uuid4().hex, kind=kind, owner_id=owner_id)
+    save_job(job)
+    return job
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    data = get_kv().get(f"{KEY_PREFIX}{job_id}")
+    return Job.unpack(data) if data is not None else None
+
+
+def start_job(job: Job):
+    job.status = "running"
+    save_job(job)
+
+
+def finish_job(job: Job, status: str):
+    job.status = status
+    job.finished_at = datetime.now(timezone.utc)
+    save_job(job)
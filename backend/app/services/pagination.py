@@ -0,0 +1,41 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def keyset_paginate(query, created_col, id_col, cursor: Optional[str], limit: int):
+    """Order newest-first on (created_at, id) and seek past the cursor instead of using OFFSET."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(
+            (created_col < created_at) |
+            ((created_col == created_at) & (id_col < row_id))
+        )
+    return query.order_by(created_col.desc(), id_col.desc()).limit(limit)
+
+
+def next_cursor(rows, limit: int) -> Optional[str]:
+    """Cursor for the page after ``rows``, or None when this was the last page."""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
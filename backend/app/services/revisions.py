@@ -0,0 +1,207 @@
+import difflib
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session, aliased
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.note import Note
+from app.models.note_revision import NoteRevision
+from app.services.audit import log_action
+from app.services.jobs import Job, finish_job, save_job, start_job
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def make_delta(base: str, target: str) -> str:
+    """Line-based delta that turns ``base`` into ``target``, as compact JSON.
+
+    Items are applied in order: a positive int copies that many lines of ``base``,
+    a negative int skips lines of ``base`` and a string is inserted as is.
+    """
+    base_lines = base.splitlines(keepends=True)
+    if base == target:
+        # Metadata-only edits still get a revision so that versions stay contiguous
+        return json.dumps([len(base_lines)] if base_lines else [])
+    target_lines = target.splitlines(keepends=True)
+    items = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, base_lines, target_lines).get_opcodes():
+        if tag == "equal":
+            items.append(i2 - i1)
+            continue
+        if i2 > i1:
+            items.append(i1 - i2)
+        if j2 > j1:
+            items.append("".join(target_lines[j1:j2]))
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    lines = base.splitlines(keepends=True)
+    out, pos = [], 0
+    for item in json.loads(delta):
+        if isinstance(item, str):
+            out.append(item)
+        elif item > 0:
+            out.extend(lines[pos:pos + item])
+            pos += item
+        else:
+            pos -= item
+    return "".join(out)
+
+
+@dataclass
+class Superseded:
+    """A note version about to be replaced, and the content replacing it."""
+    note_id: int
+    version: int
+    title: str
+    content: str
+    saved_at: Optional[datetime]
+    next_content: str
+
+
+def superseded(note: Note, next_content: str) -> Superseded:
+    """Capture ``note`` as it is now; call before changing its title or content."""
+    return Superseded(
+        note_id=note.id, version=note.version, title=note.title, content=note.content,
+        saved_at=note.updated_at or note.created_at, next_content=next_content,
+    )
+
+
+def record_revisions(db: Session, items: Sequence[Superseded]):
+    """Store the replaced versions, in the caller's transaction.
+
+    A revision is a full snapshot once ``note_revision_snapshot_every - 1`` deltas have
+    piled up above the newest snapshot, so rebuilding any version reads at most that
+    many rows.
+    """
+    if not items:
+        return
+    ids = {item.note_id for item in items}
+    snapshot = aliased(NoteRevision)
+    latest_snapshot = (
+        select(func.coalesce(func.max(snapshot.version), 0))
+        .where(snapshot.note_id == NoteRevision.note_id, snapshot.is_snapshot == True)
+        .scalar_subquery()
+    )
+    chain = dict(db.execute(
+        select(NoteRevision.note_id, func.count())
+        .where(NoteRevision.note_id.in_(ids), NoteRevision.version > latest_snapshot)
+        .group_by(NoteRevision.note_id)
+    ).all())
+    rows = []
+    for item in items:
+        is_snapshot = chain.get(item.note_id, 0) + 1 >= settings.note_revision_snapshot_every
+        chain[item.note_id] = 0 if is_snapshot else chain.get(item.note_id, 0) + 1
+        rows.append({
+            "note_id": item.note_id,
+            "version": item.version,
+            "title": item.title,
+            "is_snapshot": is_snapshot,
+            "data": item.content if is_snapshot else make_delta(item.next_content, item.content),
+            "saved_at": item.saved_at,
+        })
+    db.execute(insert(NoteRevision), rows)
+
+
+def delete_revisions(db: Session, note_ids: Iterable[int]):
+    note_ids = list(note_ids)
+    if note_ids:
+        db.execute(delete(NoteRevision).where(NoteRevision.note_id.in_(note_ids)))
+
+
+def list_revisions(db: Session, note_id: int, skip: int = 0, limit: int = 50) -> List[Tuple[int, str, Optional[datetime]]]:
+    """``(version, title, saved_at)`` of stored revisions, newest first."""
+    return db.execute(
+        select(NoteRevision.version, NoteRevision.title, NoteRevision.saved_at)
+        .where(NoteRevision.note_id == note_id)
+        .order_by(NoteRevision.version.desc())
+        .offset(skip).limit(limit)
+    ).all()
+
+
+def get_revision(db: Session, note: Note, version: int) -> Optional[Tuple[str, str, Optional[datetime]]]:
+    """Rebuild ``(title, content, saved_at)`` of a stored version of ``note``, or None.
+
+    Reads the revision, the deltas above it and the first snapshot above it (or the
+    note itself when there is none).
+    """
+    if version == note.version:
+        return note.title, note.content, note.updated_at or note.created_at
+    snapshot_version = db.scalar(
+        select(func.min(NoteRevision.version))
+        .where(NoteRevision.note_id == note.id, NoteRevision.version >= version, NoteRevision.is_snapshot == True)
+    )
+    query = select(NoteRevision).where(NoteRevision.note_id == note.id, NoteRevision.version >= version)
+    if snapshot_version is not None:
+        query = query.where(NoteRevision.version <= snapshot_version)
+    chain = db.scalars(query.order_by(NoteRevision.version.desc())).all()
+    if not chain or chain[-1].version != version:
+        return None
+    content = note.content
+    for revision in chain:
+        content = revision.data if revision.is_snapshot else apply_delta(content, revision.data)
+    target = chain[-1]
+    return target.title, content, target.saved_at
+
+
+def compact_revisions(job: Job, batch_size: int = BATCH_SIZE):
+    """Thin out old history, a chunk of notes at a time.
+
+    Beyond each note's ``note_revision_keep_recent`` newest revisions only snapshots
+    are kept: a snapshot already holds everything the deltas below it would add up
+    to, and nothing newer depends on the deltas being dropped. Revisions saved more
+    than ``note_revision_retention_days`` ago are removed outright (0 keeps them).
+    """
+    db = SessionLocal()
+    start_job(job)
+    last_id = 0
+    rank = func.row_number().over(partition_by=NoteRevision.note_id, order_by=NoteRevision.version.desc())
+    cutoff = None
+    if settings.note_revision_retention_days:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.note_revision_retention_days)
+    try:
+        while True:
+            note_ids = db.scalars(
+                select(NoteRevision.note_id).distinct()
+                .where(NoteRevision.note_id > last_id)
+                .order_by(NoteRevision.note_id).limit(batch_size)
+            ).all()
+            if not note_ids:
+                break
+            ranked = (
+                select(NoteRevision.id, NoteRevision.is_snapshot, NoteRevision.saved_at, rank.label("rank"))
+                .where(NoteRevision.note_id.in_(note_ids))
+                .subquery()
+            )
+            expired = and_(ranked.c.rank > settings.note_revision_keep_recent, ranked.c.is_snapshot == False)
+            if cutoff is not None:
+                expired = or_(expired, ranked.c.saved_at < cutoff)
+            result = db.execute(delete(NoteRevision).where(NoteRevision.id.in_(select(ranked.c.id).where(expired))))
+            db.commit()
+            last_id = note_ids[-1]
+            job.processed += len(note_ids)
+            job.succeeded += result.rowcount
+            save_job(job)
+        finish_job(job, "completed")
+    except Exception as e:
+        logger.exception("Revision compaction %s failed after note %s", job.id, last_id)
+        db.rollback()
+        job.errors.append(f"stopped after note {last_id}: {e}")
+        finish_job(job, "failed")
+    finally:
+        try:
+            log_action(
+                db, "compact_revisions", actor_id=job.owner_id,
+                payload={"job_id": job.id, "status": job.status, "notes": job.processed, "removed": job.succeeded},
+            )
+            db.commit()
+        finally:
+            db.close()
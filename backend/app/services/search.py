@@ -0,0 +1,146 @@
+import html
+import re
+from typing import Iterable, List, Tuple
+from sqlalchemy import Float, Integer, String, case, cast, column, func, literal_column, text
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.types import is_compressed
+from app.models.note import Note
+
+
+FTS_TABLE = "notes_fts"
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+# The database marks matches with private-use characters; the snippet is HTML-escaped
+# afterwards and only then are they turned into SNIPPET_START/SNIPPET_END
+_MATCH_START = "\ue000"
+_MATCH_END = "\ue001"
+
+
+class SearchNotSupported(Exception):
+    pass
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def fts5_query(q: str) -> str:
+    """Turn free text into a safe FTS5 expression: every word must match, the last one as a prefix."""
+    tokens = _TOKEN_RE.findall(q)
+    if not tokens:
+        return ""
+    quoted = [f'"{t}"' for t in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _finish_snippet(marked: str) -> str:
+    return html.escape(marked, quote=False).replace(_MATCH_START, SNIPPET_START).replace(_MATCH_END, SNIPPET_END)
+
+
+def highlight(content: str, q: str, words: int = 24) -> str:
+    """Plain-Python snippet around the first word matching ``q``, escaped and marked up like the database snippets."""
+    terms = [t.lower() for t in _TOKEN_RE.findall(q)]
+    tokens = list(_TOKEN_RE.finditer(content))
+    first = next((i for i, m in enumerate(tokens) if m.group().lower().startswith(tuple(terms))), 0) if terms else 0
+    window = tokens[max(first - words // 3, 0):][:words]
+    if not window:
+        return ""
+    parts, pos = [], window[0].start()
+    for m in window:
+        parts.append(html.escape(content[pos:m.start()], quote=False))
+        word = html.escape(m.group(), quote=False)
+        parts.append(f"{SNIPPET_START}{word}{SNIPPET_END}" if terms and m.group().lower().startswith(tuple(terms)) else word)
+        pos = m.end()
+    return "".join(parts)
+
+
+def index_notes(db: Session, notes: Iterable[Note]):
+    """Write title/content of the given notes into the search index (same transaction as the caller)."""
+    rows = [{"id": n.id, "title": n.title, "content": n.content or ""} for n in notes]
+    if not rows:
+        return
+    dialect = _dialect(db)
+    if dialect == "sqlite":
+        db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), rows)
+        db.execute(text(f"INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (:id, :title, :content)"), rows)
+    elif dialect == "postgresql":
+        db.execute(
+            text(
+                "UPDATE notes SET search_vector = "
+                "setweight(to_tsvector(CAST(:cfg AS regconfig), :title), 'A') || "
+                "setweight(to_tsvector(CAST(:cfg AS regconfig), :content), 'B') "
+                "WHERE id = :id"
+            ),
+            [dict(row, cfg=settings.search_language) for row in rows],
+        )
+
+
+def unindex_notes(db: Session, note_ids: Iterable[int]):
+    ids = [{"id": note_id} for note_id in note_ids]
+    if ids and _dialect(db) == "sqlite":
+        db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), ids)
+    # On Postgres the tsvector lives on the row and goes away with it
+
+
+def search_notes(db: Session, query, q: str, skip: int = 0, limit: int = 20) -> List[Tuple[Note, float, str]]:
+    """Rank notes from ``query`` (already visibility-filtered) against ``q``.
+
+    Returns ``(note, rank, snippet)`` tuples, best match first; higher rank is better.
+    """
+    dialect = _dialect(db)
+    if dialect == "sqlite":
+        match = fts5_query(q)
+        if not match:
+            return []
+        fts = text(
+            f"SELECT rowid AS id, -bm25({FTS_TABLE}, 10.0, 1.0) AS rank, "
+            f"snippet({FTS_TABLE}, -1, :start, :end, '…', 16) AS snippet "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        ).bindparams(match=match, start=_MATCH_START, end=_MATCH_END).columns(
+            column("id", Integer), column("rank", Float), column("snippet", String)
+        ).subquery("fts")
+        rows = (
+            query.join(fts, fts.c.id == Note.id)
+            .add_columns(fts.c.rank, fts.c.snippet)
+            .order_by(fts.c.rank.desc(), Note.id.desc())
+            .offset(skip).limit(limit)
+            .all()
+        )
+        return [(note, rank, _finish_snippet(snippet)) for note, rank, snippet in rows]
+
+    if dialect == "postgresql":
+        config = cast(settings.search_language, REGCONFIG)
+        tsquery = func.websearch_to_tsquery(config, q)
+        search_vector = literal_column("notes.search_vector")
+        rank = func.ts_rank_cd(search_vector, tsquery)
+        # Rank and limit first so ts_headline only runs for the returned page
+        page = (
+            query.with_entities(Note.id.label("id"), rank.label("rank"))
+            .filter(search_vector.op("@@")(tsquery))
+            .order_by(rank.desc(), Note.id.desc())
+            .offset(skip).limit(limit)
+            .subquery("page")
+        )
+        headline = func.ts_headline(
+            config, Note.content, tsquery,
+            f"StartSel={_MATCH_START}, StopSel={_MATCH_END}, MaxFragments=2, MaxWords=24, MinWords=8",
+        )
+        # ts_headline would quote the encoded form of a compressed body; those are highlighted in Python
+        headline = case((is_compressed(Note.content), None), else_=headline)
+        rows = (
+            db.query(Note, page.c.rank, headline)
+            .join(page, page.c.id == Note.id)
+            .order_by(page.c.rank.desc(), Note.id.desc())
+            .all()
+        )
+        return [
+            (note, rank, _finish_snippet(snippet) if snippet is not None else highlight(note.content, q))
+            for note, rank, snippet in rows
+        ]
+
+    raise SearchNotSupported(f"Full-text search is not supported on {dialect}")
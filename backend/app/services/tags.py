@@ -0,0 +1,121 @@
+from collections import Counter
+from typing import FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import Integer, bindparam, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.note import Note
+from app.models.tag import Tag, note_tags
+
+
+# (normalized tag names, counts towards the public facet)
+TagState = Tuple[FrozenSet[str], bool]
+
+
+def parse_tags(value: Optional[str]) -> List[str]:
+    """Split a comma-separated tag string into unique, normalized names, keeping their order."""
+    names = []
+    for part in (value or "").split(","):
+        name = part.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def tag_state(note: Note) -> TagState:
+    return frozenset(parse_tags(note.tags)), note.is_in_public_feed
+
+
+def _get_or_create_tags(db: Session, names: Iterable[str]) -> dict:
+    names = set(names)
+    if not names:
+        return {}
+    ids = dict(db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    missing = names - ids.keys()
+    if missing:
+        # A concurrent request may create the same tags first; its rows are then reused
+        dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        db.execute(
+            dialect_insert(Tag).on_conflict_do_nothing(index_elements=["name"]),
+            [{"name": name, "note_count": 0, "public_count": 0} for name in sorted(missing)],
+        )
+        ids.update(db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(missing))).all())
+    return ids
+
+
+def apply_tag_changes(db: Session, changes: Sequence[Tuple[int, Optional[TagState], Optional[TagState]]]):
+    """Bring note_tags and the per-tag counters in line with notes that were created, edited or deleted.
+
+    Each change is ``(note_id, old_state, new_state)``; ``old_state`` is None for a new
+    note and ``new_state`` is None for a deleted one. Runs in the caller's transaction.
+    """
+    added, removed = [], []
+    note_delta, public_delta = Counter(), Counter()
+    for note_id, old, new in changes:
+        old_names, old_public = old or (frozenset(), False)
+        new_names, new_public = new or (frozenset(), False)
+        added += [(note_id, name) for name in new_names - old_names]
+        removed += [(note_id, name) for name in old_names - new_names]
+        for name in old_names:
+            note_delta[name] -= 1
+            public_delta[name] -= old_public
+        for name in new_names:
+            note_delta[name] += 1
+            public_delta[name] += new_public
+
+    touched = {name for name in note_delta if note_delta[name] or public_delta[name]}
+    ids = _get_or_create_tags(db, touched | {name for _, name in added})
+    if removed:
+        db.execute(
+            delete(note_tags).where(
+                note_tags.c.note_id == bindparam("n_id"), note_tags.c.tag_id == bindparam("t_id")
+            ),
+            [{"n_id": note_id, "t_id": ids[name]} for note_id, name in removed],
+        )
+    if added:
+        db.execute(insert(note_tags), [{"note_id": note_id, "tag_id": ids[name]} for note_id, name in added])
+    if touched:
+        tags = Tag.__table__
+        db.execute(
+            update(tags).where(tags.c.id == bindparam("t_id")).values(
+                note_count=tags.c.note_count + bindparam("dn", type_=Integer),
+                public_count=tags.c.public_count + bindparam("dp", type_=Integer),
+            ),
+            [{"t_id": ids[name], "dn": note_delta[name], "dp": public_delta[name]} for name in touched],
+        )
+
+
+def filter_by_tags(query, names: Sequence[str], match_all: bool = True):
+    """Restrict a Note query to notes carrying all (or any) of the given tags."""
+    names = sorted({name.strip().lower() for name in names if name.strip()})
+    if not names:
+        return query
+    tagged = (
+        select(note_tags.c.note_id)
+        .join(Tag, Tag.id == note_tags.c.tag_id)
+        .where(Tag.name.in_(names))
+    )
+    if match_all and len(names) > 1:
+        tagged = tagged.group_by(note_tags.c.note_id).having(func.count(note_tags.c.tag_id) == len(names))
+    return query.filter(Note.id.in_(tagged))
+
+
+def tag_counts(db: Session, scope: str, user_id: Optional[int] = None, limit: int = 50):
+    """Tag facets as ``(name, count)`` pairs, most used first.
+
+    ``public`` and ``all`` read the maintained counters; ``my`` aggregates the
+    user's own notes through the note_tags index.
+    """
+    if scope == "my":
+        count = func.count(note_tags.c.note_id).label("count")
+        query = (
+            select(Tag.name, count)
+            .join(note_tags, note_tags.c.tag_id == Tag.id)
+            .join(Note, Note.id == note_tags.c.note_id)
+            .where(Note.author_id == user_id)
+            .group_by(Tag.name)
+            .order_by(count.desc(), Tag.name)
+        )
+    else:
+        column = Tag.public_count if scope == "public" else Tag.note_count
+        query = select(Tag.name, column).where(column > 0).order_by(column.desc(), Tag.name)
+    return db.execute(query.limit(limit)).all()
@@ -0,0 +1,100 @@
+import re
+from typing import List, Sequence
+from app.schemas.note import NoteTextOp
+
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_HEADER_PREFIXES = ("diff ", "index ", "--- ", "+++ ")
+
+
+class PatchError(ValueError):
+    """The delta is malformed or does not apply to the base text."""
+
+
+def apply_ops(text: str, ops: Sequence[NoteTextOp]) -> str:
+    """Apply insert/delete operations whose positions all refer to the original ``text``.
+
+    Operations must be ordered by position and must not overlap.
+    """
+    out, cursor = [], 0
+    for i, op in enumerate(ops):
+        if op.pos < cursor or op.pos > len(text):
+            raise PatchError(f"op {i}: position {op.pos} is out of order or out of range")
+        out.append(text[cursor:op.pos])
+        if op.op == "insert":
+            if op.text is None:
+                raise PatchError(f"op {i}: insert requires 'text'")
+            out.append(op.text)
+            cursor = op.pos
+        else:
+            if op.length is None:
+                raise PatchError(f"op {i}: delete requires 'length'")
+            cursor = op.pos + op.length
+            if cursor > len(text):
+                raise PatchError(f"op {i}: delete runs past the end of the text")
+    out.append(text[cursor:])
+    return "".join(out)
+
+
+def _diff_lines(diff: str) -> List[str]:
+    """Diff lines with '\\ No newline at end of file' folded into the line before it."""
+    lines = []
+    for line in diff.splitlines(keepends=True):
+        if line.startswith("\\"):
+            if lines:
+                lines[-1] = lines[-1].rstrip("\r\n")
+            continue
+        lines.append(line)
+    return lines
+
+
+def apply_unified_diff(text: str, diff: str) -> str:
+    """Apply a single-file unified diff (as produced by ``diff -u`` or ``git diff``) to ``text``.
+
+    Context and removed lines must match exactly; file headers are ignored.
+    """
+    source = text.splitlines(keepends=True)
+    lines = _diff_lines(diff)
+    out, pos, i, hunks = [], 0, 0, 0
+    while i < len(lines):
+        match = _HUNK_RE.match(lines[i])
+        if not match:
+            if hunks == 0 and (lines[i].startswith(_HEADER_PREFIXES) or not lines[i].strip()):
+                i += 1
+                continue
+            raise PatchError(f"diff line {i + 1}: expected a hunk header")
+        hunks += 1
+        old_start, old_count = int(match[1]), int(match[2] or 1)
+        new_count = int(match[4] or 1)
+        # An empty old range names the line after which the hunk inserts
+        start = old_start - 1 if old_count else old_start
+        if start < pos or start > len(source):
+            raise PatchError(f"hunk {hunks}: out of order or past the end of the text")
+        out.extend(source[pos:start])
+        pos = start
+        i += 1
+        old_seen = new_seen = 0
+        while i < len(lines) and (old_seen < old_count or new_seen < new_count):
+            line = lines[i]
+            # Some editors strip the single space from empty context lines
+            tag, body = (" ", line) if line in ("\n", "\r\n") else (line[:1], line[1:])
+            if tag in (" ", "-"):
+                if pos >= len(source) or source[pos] != body:
+                    raise PatchError(f"hunk {hunks}: does not apply at line {pos + 1}")
+                pos += 1
+                old_seen += 1
+                if tag == " ":
+                    out.append(body)
+                    new_seen += 1
+            elif tag == "+":
+                out.append(body)
+                new_seen += 1
+            else:
+                raise PatchError(f"diff line {i + 1}: unexpected line in hunk {hunks}")
+            i += 1
+        if old_seen != old_count or new_seen != new_count:
+            raise PatchError(f"hunk {hunks}: shorter than its header says")
+    if hunks == 0 and diff.strip():
+        raise PatchError("diff has no hunks")
+    out.extend(source[pos:])
+    return "".join(out)
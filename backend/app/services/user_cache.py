@@ -0,0 +1,100 @@
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Optional
+import redis
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "user_cache:invalidate"
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """What request authorization needs to know about the authenticated user."""
+    id: int
+    role: str
+    is_active: bool
+    is_verified: bool
+
+
+_local = LRUCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+# Bumped on every invalidation; a snapshot read before the latest bump is not cached
+_generation = itertools.count()
+_current_generation = next(_generation)
+_listener = None
+
+
+def generation() -> int:
+    return _current_generation
+
+
+def get(user_id: int) -> Optional[UserSnapshot]:
+    return _local.get(user_id)
+
+
+def put(snapshot: UserSnapshot, read_generation: int):
+    """Cache a snapshot unless an invalidation happened since it was read from the database."""
+    if read_generation == _current_generation:
+        _local.set(snapshot.id, snapshot)
+
+
+def _forget(user_id: int):
+    global _current_generation
+    _current_generation = next(_generation)
+    _local.delete(user_id)
+
+
+def _redis_enabled() -> bool:
+    # With the memory KV backend there is no Redis server to publish through
+    return settings.user_cache_redis and settings.kv_backend == "redis"
+
+
+def invalidate(user_id: int):
+    """Drop the user's snapshot here and, with user_cache_redis, in every other worker."""
+    _forget(user_id)
+    if _redis_enabled():
+        try:
+            get_redis().publish(CHANNEL, str(user_id))
+        except redis.RedisError as e:
+            logger.warning("User cache invalidation publish failed: %s", e)
+
+
+def _on_message(message):
+    try:
+        _forget(int(message["data"]))
+    except (TypeError, ValueError):
+        logger.warning("Ignoring malformed user cache invalidation: %r", message.get("data"))
+
+
+def _on_listener_error(error, pubsub, thread):
+    # Other workers' copies still expire within user_cache_ttl while Redis is unreachable
+    logger.warning("User cache invalidation listener error: %s", error)
+
+
+def start_listener():
+    """Apply invalidations published by other workers, from a background thread."""
+    global _listener
+    if not _redis_enabled() or _listener is not None:
+        return
+    try:
+        pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CHANNEL: _on_message})
+        _listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=_on_listener_error)
+    except redis.RedisError as e:
+        logger.warning("User cache invalidation listener not started: %s", e)
+
+
+def stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def stats() -> dict:
+    return _local.stats()
@@ -0,0 +1,67 @@
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.models.user_stats import UserStats
+
+
+SEARCH_MODES = ("prefix", "contains")
+# Sorts after every character, so [q, q + MAX_CHAR) is every string starting with q
+MAX_CHAR = "\U0010ffff"
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def email_search(db: Session, q: str, match: str = "prefix"):
+    """Case-insensitive condition on the email, written so the dialect's index applies.
+
+    Prefix search uses the ``lower(email)`` index: through LIKE on Postgres, where it
+    is built with text_pattern_ops, and as a range on SQLite, whose LIKE ignores
+    expression indexes. Substring search uses the trigram index on Postgres and
+    scans on SQLite.
+    """
+    email = func.lower(User.email)
+    q = q.lower()
+    if match == "contains":
+        return email.like(f"%{_escape_like(q)}%", escape="\\")
+    if db.get_bind().dialect.name == "postgresql":
+        return email.like(f"{_escape_like(q)}%", escape="\\")
+    return (email >= q) & (email < q + MAX_CHAR)
+
+
+def user_filters(
+    role: Optional[str] = None, is_active: Optional[bool] = None, is_verified: Optional[bool] = None,
+) -> list:
+    conditions = []
+    if role is not None:
+        conditions.append(User.role == role)
+    if is_active is not None:
+        conditions.append(User.is_active == is_active)
+    if is_verified is not None:
+        conditions.append(User.is_verified == is_verified)
+    return conditions
+
+
+def count_users(
+    db: Session, role: Optional[str] = None, is_active: Optional[bool] = None,
+    is_verified: Optional[bool] = None, search=None,
+) -> int:
+    """Users matching the filters, summed from the user_stats counters.
+
+    A search condition cannot be answered from the counters, so those totals are
+    counted through the search index instead.
+    """
+    if search is not None:
+        return db.scalar(
+            select(func.count()).select_from(User).where(search, *user_filters(role, is_active, is_verified))
+        )
+    query = select(func.coalesce(func.sum(UserStats.count), 0))
+    if role is not None:
+        query = query.where(UserStats.role == role)
+    if is_active is not None:
+        query = query.where(UserStats.is_active == is_active)
+    if is_verified is not None:
+        query = query.where(UserStats.is_verified == is_verified)
+    return db.scalar(query)
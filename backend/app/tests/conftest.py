@@ -1,8 +1,24 @@
+import os
 import pytest
+
+# Refresh and reset tokens stay in process, so the suite needs no Redis server
+os.environ.setdefault("KV_BACKEND", "memory")
+# Audit rows are written in the test's own transaction and rolled back with it
+os.environ.setdefault("AUDIT_MODE", "transactional")
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.db.session import Base
 from app.core.config import settings
+from app.services import email
+
+
+@pytest.fixture(autouse=True)
+def outbox(monkeypatch):
+    """Emails the app queued during the test, kept here instead of starting mail workers."""
+    messages = []
+    monkeypatch.setattr(email.mail_queue, "put", lambda message, due=None: messages.append(message))
+    return messages
 
 
 @pytest.fixture(scope="session")
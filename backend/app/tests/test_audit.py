@@ -0,0 +1,135 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.session import Base
+from app.models.audit_activity import AuditActivity
+from app.models.audit_log import AuditLog
+from app.services import audit
+from app.services.audit_buffer import AuditBuffer
+
+
+def test_buffer_writes_committed_events_in_batches(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(bind=engine, tables=[AuditLog.__table__, AuditActivity.__table__])
+    Session = sessionmaker(bind=engine)
+    buffer = AuditBuffer(batch_size=2, flush_interval=60, max_rows=4, session_factory=Session, autostart=False)
+    monkeypatch.setattr(audit, "audit_buffer", buffer)
+    monkeypatch.setattr(audit.settings, "audit_mode", "buffered")
+
+    db = Session()
+    audit.log_action(db, "kept", actor_id=1)
+    audit.log_action(db, "kept", actor_id=2)
+    db.commit()
+    audit.log_action(db, "rolled_back", actor_id=3)
+    db.rollback()
+    buffer.put([{"action": "overflow"}] * 3)
+    buffer.flush()
+
+    actions = [row.action for row in db.query(AuditLog).order_by(AuditLog.id)]
+    assert actions == ["kept", "kept", "overflow", "overflow"]
+    stats = buffer.stats()
+    assert stats["depth"] == 0 and stats["written"] == 4 and stats["dropped"] == 1
+    assert stats["batches"] == 2
+    kept = db.query(AuditActivity).filter_by(action="kept", actor_id=0).all()
+    assert sum(row.count for row in kept) == 2
+    db.close()
+    engine.dispose()
+
+
+def test_a_batch_that_keeps_failing_is_split_and_bad_events_dropped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(bind=engine, tables=[AuditLog.__table__, AuditActivity.__table__])
+    Session = sessionmaker(bind=engine)
+    buffer = AuditBuffer(batch_size=8, flush_interval=60, max_rows=100, max_attempts=2, session_factory=Session, autostart=False)
+
+    # action is NOT NULL, so the third event fails every batch it is part of
+    buffer.put([{"action": "ok", "actor_id": i} for i in range(2)] + [{"action": None, "actor_id": 2}]
+               + [{"action": "ok", "actor_id": i} for i in range(3, 5)])
+    assert buffer.flush() is False
+    assert buffer.stats()["depth"] == 5 and buffer.stats()["written"] == 0
+    assert buffer.flush() is True
+
+    db = Session()
+    assert [row.actor_id for row in db.query(AuditLog).order_by(AuditLog.id)] == [0, 1, 3, 4]
+    stats = buffer.stats()
+    assert stats["depth"] == 0 and stats["written"] == 4 and stats["dropped"] == 1
+    assert stats["failed_batches"] == 2
+    db.close()
+    engine.dispose()
+
+
+def test_transactional_rollups_wait_for_the_committed_connection(tmp_path, monkeypatch):
+    import time
+    from sqlalchemy.pool import QueuePool
+
+    # One connection in the pool: counting the rollups must not need a second one
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}", poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=1)
+    Base.metadata.create_all(bind=engine, tables=[AuditLog.__table__, AuditActivity.__table__])
+    monkeypatch.setattr(audit.settings, "audit_mode", "transactional")
+    db = sessionmaker(bind=engine)()
+    audit.log_action(db, "login", actor_id=4)
+    start = time.monotonic()
+    db.commit()
+    assert time.monotonic() - start < 0.5
+    assert sorted(db.query(AuditActivity.actor_id, AuditActivity.count)) == [(0, 1), (4, 1)]
+    db.close()
+    engine.dispose()
+
+
+def test_expired_months_are_archived_and_removed(db, tmp_path):
+    import gzip
+    import json
+    from datetime import datetime
+    from app.services.audit_retention import archive_month, expired_months
+
+    for moment in (datetime(2026, 7, 3), datetime(2026, 7, 31, 23, 59), datetime(2026, 8, 15), datetime(2026, 10, 1)):
+        db.add(AuditLog(action="login", actor_id=1, created_at=moment))
+    db.flush()
+
+    months = expired_months(db, datetime(2026, 9, 1))
+    assert months == [datetime(2026, 7, 1), datetime(2026, 8, 1)]
+    assert archive_month(db, months[0], str(tmp_path)) == 2
+
+    [archive] = tmp_path.iterdir()
+    with gzip.open(archive, "rt") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["created_at"][:10] for row in rows] == ["2026-07-03", "2026-07-31"]
+    remaining = [log.created_at.month for log in db.query(AuditLog).order_by(AuditLog.created_at)]
+    assert remaining == [8, 10]
+
+
+def test_filters_count_exactly_and_unfiltered_count_is_estimated(db):
+    from datetime import datetime, timezone
+    from app.services.audit import audit_log_filters, count_audit_logs
+
+    for i, action in enumerate(["login", "login", "delete_note"]):
+        db.add(AuditLog(action=action, actor_id=5, ip="10.0.0.1", created_at=datetime(2026, 10, 1 + i)))
+    db.flush()
+
+    assert count_audit_logs(db, audit_log_filters(action="login", actor_id=5)) == 2
+    since = datetime(2026, 10, 2, tzinfo=timezone.utc)
+    assert count_audit_logs(db, audit_log_filters(ip="10.0.0.1", since=since)) == 2
+    assert count_audit_logs(db, []) >= 3
+
+
+def test_activity_rollups_follow_audit_events(db):
+    from datetime import datetime
+    from app.services.activity import activity_series, top_actors
+    from app.services.audit import log_actions
+    from app.schemas.audit_log import AuditLogCreate
+
+    log_actions(db, [
+        AuditLogCreate(action="login", actor_id=7),
+        AuditLogCreate(action="login", actor_id=8),
+        AuditLogCreate(action="login", actor_id=7),
+        AuditLogCreate(action="create_note", actor_id=7),
+        AuditLogCreate(action="login"),
+    ])
+    db.commit()
+    since, until = datetime(2000, 1, 1), datetime(2100, 1, 1)
+
+    [day] = activity_series(db, since, until, "day")
+    assert day["counts"] == {"login": 4, "create_note": 1}
+    [hour] = activity_series(db, since, until, "hour", actions=["login"], actor_id=7)
+    assert hour["counts"] == {"login": 2}
+    leaders = top_actors(db, since, until, limit=1)
+    assert leaders == [{"actor_id": 7, "total": 3, "counts": {"login": 2, "create_note": 1}}]
@@ -22,3 +22,52 @@ def test_authenticate_user_wrong_password(db: Session):
     create_user(db, "wrong@example.com", "password123")
     user = authenticate_user(db, "wrong@example.com", "wrongpassword")
     assert user is None
+
+
+def test_verify_token_caches_only_valid_tokens():
+    from datetime import timedelta
+    from app.core.security import create_access_token, token_cache_stats, verify_token
+
+    token = create_access_token(42)
+    hits = token_cache_stats()["hits"]
+    assert verify_token(token) == "42"
+    assert verify_token(token) == "42"
+    assert token_cache_stats()["hits"] == hits + 1
+    assert verify_token(token, "refresh") is None
+
+    tampered = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+    assert verify_token(tampered) is None
+    assert verify_token(create_access_token(42, timedelta(seconds=-1))) is None
+
+
+def test_bcrypt_calibration_is_saved_and_login_rehashes(db: Session, tmp_path, monkeypatch):
+    from passlib.hash import bcrypt
+    from app.core import security
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "bcrypt_calibration_file", str(tmp_path / "bcrypt.json"))
+    monkeypatch.setattr(settings, "bcrypt_min_rounds", 4)
+    monkeypatch.setattr(settings, "bcrypt_target_ms", 1.0)
+    original = security.pwd_context.to_dict()
+    try:
+        rounds = security.configure_password_hashing()
+        assert rounds < 8
+        assert (tmp_path / "bcrypt.json").exists()
+        assert security.configure_password_hashing() == rounds
+
+        # A cost one round off, as another node type calibrates, is left alone
+        near = bcrypt.using(rounds=rounds + 1).hash("password123")
+        user = User(email="rehash@example.com", hashed_password=near)
+        db.add(user)
+        db.commit()
+        assert authenticate_user(db, "rehash@example.com", "password123") is not None
+        db.refresh(user)
+        assert user.hashed_password == near
+
+        user.hashed_password = bcrypt.using(rounds=rounds + 2).hash("password123")
+        db.commit()
+        assert authenticate_user(db, "rehash@example.com", "password123") is not None
+        db.refresh(user)
+        assert user.hashed_password.startswith(f"$2b${rounds:02d}$")
+    finally:
+        security.pwd_context.load(original)
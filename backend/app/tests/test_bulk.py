@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy.orm import Session
+from app.models.audit_log import AuditLog
+from app.models.note import Note
+from app.models.user import User
+from app.schemas.note import NoteBulkOperation
+from app.services.bulk import apply_bulk
+
+
+def _ops(*items):
+    return [NoteBulkOperation(**item) for item in items]
+
+
+def test_atomic_batch_is_rejected_as_a_whole(db: Session):
+    owner = User(email="bulkowner@example.com", hashed_password="hashed", is_verified=True)
+    other = User(email="bulkother@example.com", hashed_password="hashed", is_verified=True)
+    db.add_all([owner, other])
+    db.commit()
+    foreign = Note(title="Foreign", content="x", author_id=other.id)
+    db.add(foreign)
+    db.commit()
+
+    committed, results = apply_bulk(db, _ops(
+        {"op": "create", "note": {"title": "New", "content": "y"}},
+        {"op": "delete", "id": foreign.id},
+    ), owner)
+
+    assert not committed
+    assert [r.status for r in results] == [424, 403]
+    assert db.query(Note).filter(Note.author_id == owner.id).count() == 0
+
+
+def test_best_effort_batch_applies_valid_operations(db: Session):
+    owner = User(email="bulkbest@example.com", hashed_password="hashed", is_verified=True)
+    db.add(owner)
+    db.commit()
+    existing = Note(title="Old", content="x", author_id=owner.id)
+    db.add(existing)
+    db.commit()
+
+    committed, results = apply_bulk(db, _ops(
+        {"op": "create", "note": {"title": "New", "content": "y"}},
+        {"op": "update", "id": existing.id, "version": 1, "changes": {"title": "Renamed"}},
+        {"op": "update", "id": existing.id, "changes": {"title": "Twice"}},
+    ), owner, atomic=False)
+
+    assert committed
+    assert [r.status for r in results] == [201, 200, 400]
+    db.expire_all()
+    assert db.get(Note, existing.id).title == "Renamed"
+    assert db.get(Note, existing.id).version == 2
+    assert db.get(Note, results[0].id).title == "New"
+    actions = [log.action for log in db.query(AuditLog).filter(AuditLog.actor_id == owner.id)]
+    assert sorted(actions) == ["create_note", "update_note"]
+
+
+def test_concurrent_edit_is_not_overwritten(db: Session):
+    from sqlalchemy import text
+
+    owner = User(email="bulkrace@example.com", hashed_password="hashed", is_verified=True)
+    db.add(owner)
+    db.commit()
+    raced, calm = Note(title="Raced", content="x", author_id=owner.id), Note(title="Calm", content="x", author_id=owner.id)
+    db.add_all([raced, calm])
+    db.commit()
+    db.refresh(raced)
+    db.refresh(calm)
+    # Another request saves after our prefetch; the loaded instances still say version 1
+    db.execute(text("UPDATE notes SET title = 'Theirs', version = 2 WHERE id = :id"), {"id": raced.id})
+
+    committed, results = apply_bulk(db, _ops(
+        {"op": "update", "id": raced.id, "changes": {"title": "Mine"}},
+        {"op": "update", "id": calm.id, "changes": {"title": "Mine too"}},
+    ), owner, atomic=False)
+
+    assert committed
+    assert [r.status for r in results] == [409, 200]
+    assert db.execute(text("SELECT title, version FROM notes WHERE id = :id"), {"id": raced.id}).one() == ("Theirs", 2)
+    actions = [log.target_id for log in db.query(AuditLog).filter(AuditLog.actor_id == owner.id)]
+    assert actions == [calm.id]
@@ -0,0 +1,60 @@
+import time
+from app.core.cache import LRUCache
+from app.services import feed_cache
+from app.services.feed_cache import FeedPage
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["hits"] == 3
+
+
+def test_lru_entries_expire():
+    cache = LRUCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_feed_page_round_trip():
+    page = FeedPage(body=b'[{"title": "x\\ny"}]', etag='"abc"', next_cursor=None)
+    assert FeedPage.unpack(page.pack()) == page
+
+
+def test_feed_page_built_across_an_invalidation_is_not_cached(monkeypatch):
+    monkeypatch.setattr(feed_cache.settings, "public_feed_cache_redis", False)
+    feed_cache.invalidate()
+
+    def stale_build():
+        feed_cache.invalidate()  # A write commits while the page is being built
+        return FeedPage(body=b"[]", etag='"stale"')
+
+    assert feed_cache.get_or_build("race", stale_build).etag == '"stale"'
+    fresh = feed_cache.get_or_build("race", lambda: FeedPage(body=b"[1]", etag='"fresh"'))
+    assert fresh.etag == '"fresh"'
+    assert feed_cache.get_or_build("race", lambda: FeedPage(body=b"[2]", etag='"again"')) is fresh
+
+
+def test_redis_tiers_are_skipped_with_the_memory_kv_backend(monkeypatch):
+    from app.services import user_cache
+
+    def no_redis():
+        raise AssertionError("Redis used with KV_BACKEND=memory")
+
+    monkeypatch.setattr(feed_cache.settings, "kv_backend", "memory")
+    monkeypatch.setattr(feed_cache.settings, "public_feed_cache_redis", True)
+    monkeypatch.setattr(feed_cache.settings, "user_cache_redis", True)
+    monkeypatch.setattr(feed_cache, "get_redis", no_redis)
+    monkeypatch.setattr(user_cache, "get_redis", no_redis)
+
+    feed_cache.invalidate()
+    assert feed_cache.get_or_build("memory", lambda: FeedPage(body=b"[]", etag='"m"')).etag == '"m"'
+    user_cache.invalidate(1)
+    user_cache.start_listener()
+    assert user_cache._listener is None
@@ -0,0 +1,87 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.api.projection import project, serialize
+from app.db.types import MARKER, decode_text, encode_text
+from app.models.note import Note
+from app.models.user import User
+
+
+def test_codec_round_trips_and_leaves_plain_text_alone():
+    body = "GET /notes 200 12ms\n" * 200
+    packed = encode_text(body, threshold=1024)
+    assert packed.startswith(MARKER + "z") and len(packed) < len(body)
+    assert decode_text(packed) == body
+
+    assert encode_text("short", threshold=1024) == "short"
+    assert encode_text(body, threshold=0) == body
+    # Text that happens to start with the marker is escaped rather than misread
+    tricky = MARKER + "zoops"
+    assert decode_text(encode_text(tricky, threshold=1024)) == tricky
+
+
+def test_compressed_rows_read_back_through_model_and_projection(db: Session):
+    user = User(email="compress@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+    body = "line of a long pasted log file\n" * 500
+    db.add_all([
+        Note(title="big", content=body, author_id=user.id),
+        Note(title="plain", content="old row", author_id=user.id),
+    ])
+    db.commit()
+
+    stored = dict(db.execute(text("SELECT title, content FROM notes WHERE author_id = :a"), {"a": user.id}).all())
+    assert stored["big"].startswith(MARKER) and stored["plain"] == "old row"
+
+    db.expire_all()
+    assert db.query(Note).filter(Note.title == "big").one().content == body
+
+    query = project(db.query(Note).filter(Note.author_id == user.id).order_by(Note.id), ["title", "content_preview", "content_length"])
+    assert serialize(query.all(), ["title", "content_preview", "content_length"]) == (
+        b'[{"title":"big","content_preview":"' + body[:200].replace("\n", "\\n").encode()
+        + b'","content_length":%d},{"title":"plain","content_preview":"old row","content_length":7}]' % len(body)
+    )
+
+
+def test_recompression_leaves_rows_edited_meanwhile(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.db.session import Base
+    from app.services import compression
+    from app.services.jobs import create_job
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'recompress.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    user = User(email="recompress@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+    body = "a long body that compresses well\n" * 100
+    monkeypatch.setattr(compression.settings, "note_compression_threshold", 0)
+    notes = [Note(title=f"n{i}", content=body, author_id=user.id) for i in range(2)]
+    db.add_all(notes)
+    db.commit()
+    edited_id = notes[0].id
+
+    original_encode = compression.encode_text
+
+    def encode_during_edit(*args):
+        if not getattr(encode_during_edit, "edited", False):
+            encode_during_edit.edited = True
+            with engine.begin() as connection:  # The user saves between the job's read and write
+                connection.execute(text("UPDATE notes SET content = 'edited' WHERE id = :id"), {"id": edited_id})
+        return original_encode(*args)
+
+    monkeypatch.setattr(compression, "encode_text", encode_during_edit)
+    monkeypatch.setattr(compression, "SessionLocal", Session)
+    monkeypatch.setattr(compression.settings, "note_compression_threshold", 64)
+    job = create_job("recompress_notes", user.id)
+    compression.recompress_notes(job)
+
+    assert job.status == "completed" and job.succeeded == 1
+    stored = dict(db.execute(text("SELECT id, content FROM notes")).all())
+    assert stored[edited_id] == "edited"
+    assert stored[notes[1].id].startswith(MARKER)
+    db.close()
+    engine.dispose()
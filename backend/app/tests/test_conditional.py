@@ -0,0 +1,71 @@
+from app.api.conditional import make_etag, etag_matches, etag_matches_strong
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag(b"page", weak=True)
+    assert etag.startswith('W/"')
+    assert etag_matches(etag[2:], etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+
+
+def test_if_match_uses_strong_comparison():
+    assert etag_matches_strong('"7-2"', '"7-2"')
+    assert not etag_matches_strong('W/"7-2"', '"7-2"')
+    assert not etag_matches_strong('"7-1"', '"7-2"')
+    assert etag_matches_strong("*", '"7-2"')
+
+
+def test_list_etag_changes_when_page_membership_changes(db):
+    from app.api.notes import _list_etag
+    from app.models.note import Note
+    from app.models.user import User
+
+    user = User(email="etag@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+    notes = [Note(title=f"n{i}", content="x", author_id=user.id) for i in range(5)]
+    db.add_all(notes)
+    db.commit()
+
+    def page_etag():
+        page = db.query(Note).filter(Note.author_id == user.id).order_by(Note.id.desc()).limit(3)
+        return _list_etag(db, page, "key")
+
+    before = page_etag()
+    db.delete(notes[3])  # The page keeps its count, newest id and version sum
+    db.commit()
+    assert page_etag() != before
+
+
+def test_compare_and_set_rejects_a_stale_version(tmp_path):
+    import pytest
+    from fastapi import HTTPException
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.api.notes import _compare_and_set
+    from app.db.session import Base
+    from app.models.note import Note
+    from app.models.user import User
+
+    # The conflict path rolls back, so this needs a session of its own rather than the db fixture
+    engine = create_engine(f"sqlite:///{tmp_path / 'cas.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(email="cas@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+    note = Note(title="t", content="x", author_id=user.id)
+    db.add(note)
+    db.commit()
+
+    assert _compare_and_set(db, note.id, 1, title="first") == 2
+    db.commit()
+    with pytest.raises(HTTPException) as conflict:
+        _compare_and_set(db, note.id, 1, title="second")
+    assert conflict.value.status_code == 409 and conflict.value.headers["ETag"] == f'"{note.id}-2"'
+    db.refresh(note)
+    assert note.title == "first"
+    db.close()
+    engine.dispose()
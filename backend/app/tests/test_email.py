@@ -0,0 +1,114 @@
+import smtplib
+import socket
+import time
+import pytest
+from aiosmtpd.controller import Controller
+from app.services import email
+from app.services.email import MailQueue, OutgoingEmail
+
+
+class Inbox:
+    def __init__(self, refuse=(), greylist=()):
+        self.messages = []
+        self.sessions = set()
+        self.refuse = refuse
+        self.greylist = set(greylist)  # Deferred once, then accepted
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return "550 no such user"
+        if address in self.greylist:
+            self.greylist.discard(address)
+            return "451 4.7.1 Greylisted, try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.messages.append((envelope.rcpt_tos[0], envelope.content.decode()))
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    inbox = Inbox(refuse={"nobody@example.com"}, greylist={"new@example.com"})
+    controller = Controller(inbox, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(email.settings, "smtp_server", "127.0.0.1")
+    monkeypatch.setattr(email.settings, "smtp_port", controller.port)
+    monkeypatch.setattr(email.settings, "smtp_username", None)
+    yield inbox
+    controller.stop()
+
+
+def make_queue(**overrides) -> MailQueue:
+    options = dict(workers=1, batch_size=10, max_attempts=3, retry_base=0.05, retry_max=1, idle_timeout=5, max_queued=100)
+    options.update(overrides)
+    return MailQueue(**options)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_queued_mail_is_delivered_over_one_connection(smtp):
+    queue = make_queue()
+    for n in range(5):
+        queue.put(OutgoingEmail(f"user{n}@example.com", f"Hello {n}", "<p>hi</p>"))
+    queue.put(OutgoingEmail("nobody@example.com", "Bounced", "<p>hi</p>"))
+    wait_for(lambda: queue.stats()["sent"] + queue.stats()["failed"] == 6)
+    queue.stop()
+
+    assert sorted(to for to, _ in smtp.messages) == [f"user{n}@example.com" for n in range(5)]
+    assert "Subject: Hello 0" in dict(smtp.messages)["user0@example.com"]
+    stats = queue.stats()
+    assert stats["connections_opened"] == 1
+    assert stats["failed"] == 1 and stats["retried"] == 0  # A 550 is final
+    assert stats["queued"] == 0 and stats["latency_ms_max"] > 0
+
+
+def test_failed_deliveries_are_retried_with_backoff(smtp, monkeypatch):
+    queue = make_queue()
+    connect = queue._connect
+    failures = iter([OSError("connection refused")])
+
+    def flaky_connect():
+        for error in failures:
+            raise error
+        return connect()
+
+    monkeypatch.setattr(queue, "_connect", flaky_connect)
+    queue.put(OutgoingEmail("user@example.com", "Retried", "<p>hi</p>"))
+    wait_for(lambda: queue.stats()["sent"] == 1)
+    queue.stop()
+    assert queue.stats()["retried"] == 1
+    assert [to for to, _ in smtp.messages] == ["user@example.com"]
+
+
+def test_greylisted_recipients_are_retried(smtp):
+    queue = make_queue()
+    queue.put(OutgoingEmail("new@example.com", "Greylisted", "<p>hi</p>"))
+    wait_for(lambda: queue.stats()["sent"] + queue.stats()["failed"] == 1)
+    queue.stop()
+    stats = queue.stats()
+    assert stats["sent"] == 1 and stats["retried"] == 1 and stats["failed"] == 0
+    assert [to for to, _ in smtp.messages] == ["new@example.com"]
+
+
+def test_mail_is_given_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(email.settings, "smtp_server", "127.0.0.1")
+    monkeypatch.setattr(email.settings, "smtp_port", free_port())  # Nothing listening
+    queue = make_queue(max_attempts=2)
+    queue.put(OutgoingEmail("user@example.com", "Lost", "<p>hi</p>"))
+    wait_for(lambda: queue.stats()["failed"] == 1)
+    queue.stop()
+    assert queue.stats()["retried"] == 1 and queue.stats()["sent"] == 0
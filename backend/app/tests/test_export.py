@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.session import Base
+from app.models.note import Note, Visibility
+from app.models.user import User
+from app.services import export
+from app.services.importer import iter_markdown_records, iter_ndjson_records
+
+
+@pytest.fixture
+def author(tmp_path, monkeypatch):
+    """A user with no notes yet, in a database the export's own async sessions can see."""
+    path = tmp_path / "export.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(email="exporter@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(export, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    yield db, user
+    db.close()
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+
+
+def collect(chunks) -> list:
+    async def drain():
+        return [chunk async for chunk in chunks]
+    return asyncio.run(drain())
+
+
+def add_notes(db, user, count: int):
+    db.add_all([
+        Note(title=f"Note {i}", content=f"# Note {i}\n\nbody {i}", author_id=user.id,
+             visibility=Visibility.public if i % 2 else Visibility.private, tags="a,b")
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def test_ndjson_export_round_trips_and_starts_with_the_first_note(author, tmp_path):
+    db, user = author
+    add_notes(db, user, 3)
+
+    chunks = collect(export.iter_ndjson(user.id))
+    assert chunks[0].count(b"\n") == 1  # Sent before the rest is read
+    path = tmp_path / "notes.ndjson"
+    path.write_bytes(b"".join(chunks))
+    records = [record for _, record, error in iter_ndjson_records(str(path)) if error is None]
+    assert [(r["title"], r["content"], r["visibility"]) for r in records] == [
+        (f"Note {i}", f"# Note {i}\n\nbody {i}", "public" if i % 2 else "private") for i in range(3)
+    ]
+
+
+def test_zip_export_round_trips(author, tmp_path):
+    db, user = author
+    add_notes(db, user, 3)
+
+    path = tmp_path / "notes.zip"
+    path.write_bytes(b"".join(collect(export.iter_markdown_zip(user.id))))
+    records = [record for _, record, error in iter_markdown_records(str(path)) if error is None]
+    assert [(r["title"], r["content"], r["tags"]) for r in records] == [
+        (f"Note {i}", f"# Note {i}\n\nbody {i}", "a,b") for i in range(3)
+    ]
+
+
+def test_empty_exports(author, tmp_path):
+    _, user = author
+    assert b"".join(collect(export.iter_ndjson(user.id))) == b""
+    path = tmp_path / "empty.zip"
+    path.write_bytes(b"".join(collect(export.iter_markdown_zip(user.id))))
+    assert list(iter_markdown_records(str(path))) == []
+
+
+def test_compressed_bodies_are_exported_decoded(author, monkeypatch):
+    import json
+    from sqlalchemy import Text, select, type_coerce
+    from app.core.config import settings
+    from app.db.types import MARKER
+
+    db, user = author
+    monkeypatch.setattr(settings, "note_compression_threshold", 100)
+    body = "compressible line\n" * 200
+    db.add(Note(title="Long", content=body, author_id=user.id))
+    db.commit()
+    assert db.execute(select(type_coerce(Note.content, Text))).scalar().startswith(MARKER)
+
+    [line] = b"".join(collect(export.iter_ndjson(user.id))).splitlines()
+    assert json.loads(line)["content"] == body
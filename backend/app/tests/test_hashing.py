@@ -0,0 +1,21 @@
+import threading
+import pytest
+from app.core.hashing import HashPool, HashPoolSaturated
+
+
+def test_pool_rejects_work_beyond_queue_limit():
+    pool = HashPool(workers=1, queue_limit=1)
+    release = threading.Event()
+    running = pool.submit(release.wait)
+    queued = pool.submit(release.wait)
+    with pytest.raises(HashPoolSaturated):
+        pool.submit(release.wait)
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    assert running.result() and queued.result()
+    assert pool.call(len, "abc") == 3
+    stats = pool.stats()
+    assert stats["completed"] == 3
+    assert stats["running"] == 0 and stats["queued"] == 0
+    pool.shutdown()
@@ -0,0 +1,37 @@
+import zipfile
+from app.models.note import Note, Visibility
+from app.services.export import markdown_filename, to_markdown
+from app.services.importer import iter_markdown_records, iter_ndjson_records, parse_markdown
+
+
+def test_markdown_export_round_trips():
+    note = Note(id=7, title="Plan: Q3", content="# Goals\n\nShip it\n", visibility=Visibility.public, is_draft=False, tags="work,q3")
+
+    record = parse_markdown(to_markdown(note), markdown_filename(note))
+
+    assert record["title"] == "Plan: Q3"
+    assert record["content"] == note.content
+    assert record["visibility"] == "public"
+    assert record["tags"] == "work,q3"
+
+
+def test_plain_markdown_takes_title_from_heading_or_file_name():
+    assert parse_markdown("# Heading\n\nText", "a.md")["title"] == "Heading"
+    assert parse_markdown("Just text", "dir/ideas.md")["title"] == "ideas"
+
+
+def test_records_report_bad_input_without_stopping(tmp_path):
+    ndjson = tmp_path / "notes.ndjson"
+    ndjson.write_bytes(b'{"title": "a", "content": "b"}\n\nnot json\n[1]\n{"title": "c", "content": "d"}\n')
+    records = list(iter_ndjson_records(str(ndjson)))
+    assert [(source, error is None) for source, _, error in records] == [
+        ("line 1", True), ("line 3", False), ("line 4", False), ("line 5", True)
+    ]
+
+    archive = tmp_path / "notes.zip"
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("one.md", "# One\n\nfirst")
+        z.writestr("image.png", b"\x89PNG")
+        z.writestr("two.md", b"\xff\xfe")
+    records = list(iter_markdown_records(str(archive)))
+    assert [(source, error) for source, _, error in records] == [("one.md", None), ("two.md", "not valid UTF-8")]
@@ -0,0 +1,48 @@
+import time
+from app.core.kv import MemoryStore
+from app.models.user import User
+from app.services.auth import create_tokens, logout, refresh_access_token
+
+
+def test_memory_store_expiry_and_compare_and_set():
+    store = MemoryStore()
+    store.setex("k", 60, 1)
+    assert store.get("k") == b"1"
+    assert not store.compare_and_set("k", "2", "3", 60)
+    assert store.compare_and_set("k", "1", "3", 60)
+    assert store.get("k") == b"3"
+
+    store.setex("short", 1, "x")
+    store._data["short"] = (b"x", time.monotonic() - 1)
+    assert store.get("short") is None
+    store.delete("k")
+    assert store.get("k") is None
+
+
+def test_refresh_token_rotates_once_without_redis():
+    user = User(id=777, email="kv@example.com")
+    tokens = create_tokens(user)
+    rotated = refresh_access_token(777, tokens.refresh_token)
+    assert rotated is not None
+    # The old token was redeemed; replaying it fails
+    assert refresh_access_token(777, tokens.refresh_token) is None
+    logout(777)
+    assert refresh_access_token(777, rotated.refresh_token) is None
+
+
+def test_job_status_is_read_back_from_the_store():
+    from app.services.jobs import create_job, finish_job, get_job, save_job, start_job
+
+    job = create_job("import_notes", owner_id=7)
+    start_job(job)
+    job.processed, job.succeeded = 3, 2
+    job.add_error("line 2: bad json")
+    save_job(job)
+
+    # What another worker sees: a copy rebuilt from the store, not this process's object
+    seen = get_job(job.id)
+    assert seen is not job and seen == job
+    finish_job(job, "completed")
+    seen = get_job(job.id)
+    assert seen.status == "completed" and seen.finished_at == job.finished_at
+    assert get_job("missing") is None
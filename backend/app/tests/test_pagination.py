@@ -0,0 +1,42 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.models.note import Note
+from app.models.user import User
+from app.services.pagination import (
+    encode_cursor, decode_cursor, keyset_paginate, next_cursor, InvalidCursor
+)
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_invalid_cursor():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_keyset_pages_match_offset_pages(db: Session):
+    user = User(email="pager@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+
+    base = datetime(2024, 1, 1)
+    for i in range(7):
+        # Pairs of notes share a timestamp so the id tie-breaker matters
+        db.add(Note(title=f"Note {i}", content="x", author_id=user.id, created_at=base + timedelta(minutes=i // 2)))
+    db.commit()
+
+    query = db.query(Note).filter(Note.author_id == user.id)
+    expected = [n.id for n in query.order_by(Note.created_at.desc(), Note.id.desc()).all()]
+
+    seen, cursor = [], None
+    while True:
+        page = keyset_paginate(query, Note.created_at, Note.id, cursor, 3).all()
+        seen.extend(n.id for n in page)
+        cursor = next_cursor(page, 3)
+        if cursor is None:
+            break
+    assert seen == expected
@@ -0,0 +1,28 @@
+from sqlalchemy import create_engine, text
+from app.db.pool import InstrumentedQueuePool, apply_sqlite_pragmas, engine_options
+
+
+def test_sqlite_profile_and_pool_stats(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **engine_options(url))
+    apply_sqlite_pragmas(engine)
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert engine.pool.stats()["checked_out"] == 1
+    with engine.connect():
+        pass
+
+    stats = engine.pool.stats()
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 0
+    engine.dispose()
+
+
+def test_memory_and_async_sqlite_keep_default_pools():
+    assert engine_options("sqlite://") == {}
+    assert engine_options("sqlite+aiosqlite:///./app.db", is_async=True) == {}
+    assert engine_options("postgresql+asyncpg://u@h/db", is_async=True)["pool_size"] == 5
@@ -0,0 +1,46 @@
+import json
+import re
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.api.projection import SUMMARY_FIELDS, parse_fields, project, serialize
+from app.models.note import Note, Visibility
+from app.models.user import User
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields("summary") == SUMMARY_FIELDS
+    assert parse_fields("title, id,title") == ["title", "id"]
+    with pytest.raises(HTTPException) as error:
+        parse_fields("title,password")
+    assert error.value.status_code == 400 and "password" in error.value.detail
+
+
+def test_summary_shape_without_reading_content(db: Session):
+    user = User(email="projection@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+    body = "é" * 250
+    db.add(Note(title="long", content=body, author_id=user.id, visibility=Visibility.public, tags="a,b"))
+    db.commit()
+    db.expire_all()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind().engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        rows = project(db.query(Note).filter(Note.author_id == user.id), SUMMARY_FIELDS).all()
+        [item] = json.loads(serialize(rows, SUMMARY_FIELDS))
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert list(item) == SUMMARY_FIELDS
+    assert item["visibility"] == "public" and item["tags"] == "a,b"
+    assert item["content_length"] == 250 and item["content_preview"] == body[:200]
+    assert statements and not any(re.search(r"notes\.content\b(?!_)", statement) for statement in statements)
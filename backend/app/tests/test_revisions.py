@@ -0,0 +1,90 @@
+import random
+import pytest
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.note import Note
+from app.models.note_revision import NoteRevision
+from app.models.user import User
+from app.services.revisions import apply_delta, get_revision, make_delta, record_revisions, superseded
+
+
+@pytest.mark.parametrize("base,target", [
+    ("a\nb\nc\n", "a\nB\nc\n"),
+    ("", "new\n"),
+    ("old\n", ""),
+    ("same\n", "same\n"),
+    ("no newline", "no newline\nmore"),
+])
+def test_delta_round_trips(base, target):
+    assert apply_delta(base, make_delta(base, target)) == target
+
+
+def test_every_version_is_rebuilt_from_deltas_and_snapshots(db: Session, monkeypatch):
+    monkeypatch.setattr(settings, "note_revision_snapshot_every", 4)
+    user = User(email="history@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+    rng = random.Random(7)
+    lines = [f"line {i}\n" for i in range(20)]
+    note = Note(title="v1", content="".join(lines), author_id=user.id)
+    db.add(note)
+    db.commit()
+    history = {1: ("v1", note.content)}
+
+    for version in range(2, 15):
+        lines[rng.randrange(len(lines))] = f"edit {version}\n"
+        content = "".join(lines)
+        record_revisions(db, [superseded(note, content)])
+        note.title, note.content, note.version = f"v{version}", content, version
+        db.commit()
+        history[version] = (note.title, content)
+
+    snapshots = [v for (v,) in db.query(NoteRevision.version).filter(NoteRevision.note_id == note.id, NoteRevision.is_snapshot == True)]
+    assert snapshots == [4, 8, 12]
+    for version, (title, content) in history.items():
+        assert get_revision(db, note, version)[:2] == (title, content)
+    assert get_revision(db, note, 99) is None
+
+
+def test_racing_writes_on_one_version_leave_a_single_revision(tmp_path):
+    from types import SimpleNamespace
+    from fastapi import HTTPException, Response
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.api.notes import restore_note_revision, update_note
+    from app.db.session import Base
+    from app.schemas.note import NoteUpdate
+
+    # The losing write rolls back, so the two "requests" get sessions of their own
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}")
+    Base.metadata.create_all(bind=engine)
+    Sessions = sessionmaker(bind=engine)
+    winner, loser = Sessions(), Sessions()
+    user = User(email="race@example.com", hashed_password="hashed", is_verified=True)
+    winner.add(user)
+    winner.commit()
+    note = Note(title="v1", content="one\n", author_id=user.id, visibility="private")
+    winner.add(note)
+    winner.commit()
+    request = SimpleNamespace(headers={})
+
+    # Both requests read version 1 before either writes
+    stale = loser.get(Note, note.id)
+    update_note(note.id, NoteUpdate(content="two\n"), request, Response(), winner, user)
+    with pytest.raises(HTTPException) as conflict:
+        update_note(note.id, NoteUpdate(content="three\n"), request, Response(), loser, user)
+    assert conflict.value.status_code == 409
+
+    stale = loser.get(Note, note.id)
+    update_note(note.id, NoteUpdate(content="four\n"), request, Response(), winner, user)
+    with pytest.raises(HTTPException) as conflict:
+        restore_note_revision(note.id, 1, request, Response(), loser, user)
+    assert conflict.value.status_code == 409
+
+    revisions = [v for (v,) in winner.query(NoteRevision.version).filter(NoteRevision.note_id == note.id).order_by(NoteRevision.version)]
+    assert revisions == [1, 2]
+    winner.refresh(note)
+    assert (note.version, note.content) == (3, "four\n")
+    winner.close()
+    loser.close()
+    engine.dispose()
@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy.orm import Session
+from app.models.note import Note, Visibility
+from app.models.user import User
+from app.services.search import fts5_query, highlight, index_notes, unindex_notes, search_notes
+
+
+def test_fts5_query_quotes_user_input():
+    assert fts5_query('vacuum "analyze') == '"vacuum" "analyze"*'
+    assert fts5_query('") OR (') == '"OR"*'
+    assert fts5_query("!!!") == ""
+
+
+def test_search_ranks_and_respects_query_filters(db: Session):
+    user = User(email="searcher@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+
+    in_title = Note(title="Vacuum tuning", content="autovacuum thresholds", author_id=user.id, visibility=Visibility.public)
+    in_body = Note(title="Maintenance", content="run vacuum weekly", author_id=user.id, visibility=Visibility.public)
+    private = Note(title="Vacuum cleaner", content="buy one", author_id=user.id, visibility=Visibility.private)
+    db.add_all([in_title, in_body, private])
+    db.flush()
+    index_notes(db, [in_title, in_body, private])
+    db.commit()
+
+    public_only = db.query(Note).filter(Note.visibility == Visibility.public)
+    results = search_notes(db, public_only, "vacuum")
+    assert [note.id for note, _, _ in results] == [in_title.id, in_body.id]
+    assert "<mark>" in results[1][2]
+
+    unindex_notes(db, [in_title.id])
+    assert [note.id for note, _, _ in search_notes(db, public_only, "vacuum")] == [in_body.id]
+
+
+def test_snippets_escape_note_text(db: Session):
+    user = User(email="escaper@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+    note = Note(title="Markup", content='vacuum <script>alert("x")</script> & more', author_id=user.id)
+    db.add(note)
+    db.flush()
+    index_notes(db, [note])
+
+    [(_, _, snippet)] = search_notes(db, db.query(Note).filter(Note.id == note.id), "vacuum")
+    assert "<script>" not in snippet and "&lt;script&gt;" in snippet
+    assert snippet.startswith("<mark>vacuum</mark>")
+    assert "<script>" not in highlight(note.content, "alert")
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy.orm import Session
+from app.models.note import Note, Visibility
+from app.models.tag import Tag
+from app.models.user import User
+from app.services.tags import parse_tags, tag_state, apply_tag_changes, filter_by_tags
+
+
+def test_parse_tags_normalizes_and_dedupes():
+    assert parse_tags(" Python, db ,python,,") == ["python", "db"]
+    assert parse_tags(None) == []
+
+
+def test_tag_counts_follow_note_changes(db: Session):
+    user = User(email="tagger@example.com", hashed_password="hashed", is_verified=True)
+    db.add(user)
+    db.commit()
+
+    note = Note(title="Tagged", content="x", author_id=user.id, visibility=Visibility.public, tags="db, python")
+    other = Note(title="Other", content="x", author_id=user.id, tags="db")
+    db.add_all([note, other])
+    db.flush()
+    apply_tag_changes(db, [(note.id, None, tag_state(note)), (other.id, None, tag_state(other))])
+
+    counts = {t.name: (t.note_count, t.public_count) for t in db.query(Tag).all()}
+    assert counts == {"db": (2, 1), "python": (1, 1)}
+
+    both = filter_by_tags(db.query(Note), ["db", "python"])
+    assert [n.id for n in both.all()] == [note.id]
+    either = filter_by_tags(db.query(Note), ["python", "db"], match_all=False)
+    assert {n.id for n in either.all()} == {note.id, other.id}
+
+    old = tag_state(note)
+    note.tags = "python"
+    note.visibility = "private"
+    apply_tag_changes(db, [(note.id, old, tag_state(note)), (other.id, tag_state(other), None)])
+    db.expire_all()
+
+    counts = {t.name: (t.note_count, t.public_count) for t in db.query(Tag).all()}
+    assert counts == {"db": (0, 0), "python": (1, 0)}
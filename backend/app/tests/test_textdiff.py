@@ -0,0 +1,42 @@
+import difflib
+import pytest
+from app.schemas.note import NoteTextOp
+from app.services.textdiff import PatchError, apply_ops, apply_unified_diff
+
+
+def _udiff(a: str, b: str, context: int = 3) -> str:
+    lines = []
+    for line in difflib.unified_diff(a.splitlines(keepends=True), b.splitlines(keepends=True), "a", "b", n=context):
+        lines.append(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n")
+    return "".join(lines)
+
+
+@pytest.mark.parametrize("before,after", [
+    ("one\ntwo\nthree\n", "one\n2\nthree\n"),
+    ("", "first line\n"),
+    ("a\nb\nc\nd\ne\nf\ng\nh\n", "a\nB\nc\nd\ne\nf\nG\nh\nend"),
+    ("no newline", "no newline\nnow there is\n"),
+])
+def test_unified_diff_reproduces_target(before, after):
+    for context in (0, 3):
+        assert apply_unified_diff(before, _udiff(before, after, context)) == after
+
+
+def test_unified_diff_rejects_mismatched_context():
+    with pytest.raises(PatchError):
+        apply_unified_diff("one\ntwo\n", _udiff("one\nTWO\n", "one\n2\n"))
+    with pytest.raises(PatchError):
+        apply_unified_diff("text\n", "not a diff")
+
+
+def test_ops_are_applied_against_base_positions():
+    ops = [
+        NoteTextOp(op="insert", pos=0, text="goodbye"),
+        NoteTextOp(op="delete", pos=0, length=5),
+        NoteTextOp(op="insert", pos=11, text="!"),
+    ]
+    assert apply_ops("hello world", ops) == "goodbye world!"
+    with pytest.raises(PatchError):
+        apply_ops("hello", [NoteTextOp(op="delete", pos=3, length=1), NoteTextOp(op="insert", pos=1, text="x")])
+    with pytest.raises(PatchError):
+        apply_ops("hello", [NoteTextOp(op="delete", pos=3, length=5)])
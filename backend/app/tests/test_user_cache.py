@@ -0,0 +1,20 @@
+from app.services import user_cache
+from app.services.user_cache import UserSnapshot
+
+
+def test_invalidate_drops_snapshot():
+    snapshot = UserSnapshot(id=901, role="user", is_active=True, is_verified=True)
+    user_cache.put(snapshot, user_cache.generation())
+    assert user_cache.get(901) == snapshot
+
+    user_cache.invalidate(901)
+    assert user_cache.get(901) is None
+
+
+def test_read_racing_an_invalidation_is_not_cached():
+    read_generation = user_cache.generation()
+    stale = UserSnapshot(id=902, role="admin", is_active=True, is_verified=True)
+    # The role is changed and invalidated while the stale row is in flight
+    user_cache.invalidate(902)
+    user_cache.put(stale, read_generation)
+    assert user_cache.get(902) is None
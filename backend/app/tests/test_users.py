@@ -0,0 +1,40 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.services.users import count_users, email_search, user_filters
+
+
+def counted(db: Session, **filters) -> int:
+    return db.scalar(select(func.count()).select_from(User).where(*user_filters(**filters)))
+
+
+def test_user_stats_follow_inserts_updates_and_deletes(db: Session):
+    alice = User(email="alice@example.com", hashed_password="x")
+    bob = User(email="bob@example.com", hashed_password="x", role="admin", is_verified=True)
+    carol = User(email="carol@example.com", hashed_password="x")
+    db.add_all([alice, bob, carol])
+    db.commit()
+    alice.is_verified = True
+    carol.is_active = False
+    db.commit()
+    db.delete(bob)
+    db.commit()
+
+    for filters in ({}, {"role": "user"}, {"role": "admin"}, {"is_active": False}, {"is_verified": True},
+                    {"role": "user", "is_active": True, "is_verified": True}):
+        assert count_users(db, **filters) == counted(db, **filters)
+
+
+def test_email_search_by_prefix_and_substring(db: Session):
+    for email in ("Dana.Smith@example.com", "dan@example.org", "jordan@example.com", "d_n@example.com"):
+        db.add(User(email=email, hashed_password="x"))
+    db.commit()
+
+    def found(q, match="prefix"):
+        return sorted(db.scalars(select(User.email).where(email_search(db, q, match))))
+
+    assert found("dan") == ["Dana.Smith@example.com", "dan@example.org"]
+    assert found("DAN", "contains") == ["Dana.Smith@example.com", "dan@example.org", "jordan@example.com"]
+    assert found("d_n") == ["d_n@example.com"]  # LIKE wildcards match literally
+    assert found("d_n", "contains") == ["d_n@example.com"]
+    assert count_users(db, search=email_search(db, "dan")) == 2
@@ -1,7 +1,9 @@
+from app.core.security import configure_password_hashing
 from app.db.init_db import init_db
 
 if __name__ == "__main__":
     print("Initializing demo users...")
+    configure_password_hashing()
     init_db()
     print("Demo users created successfully!")
     print("Admin: admin@example.com / AdminPass123!")
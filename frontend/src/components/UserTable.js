@@ -18,7 +18,7 @@ const UserTable = ({ showNotification }) => {
   const fetchUsers = async () => {
     try {
       const response = await axios.get(`${API_BASE_URL}/admin/users`);
-      setUsers(response.data);
+      setUsers(response.data.users);
     } catch (error) {
       showNotification('Failed to fetch users', 'error');
     } finally {
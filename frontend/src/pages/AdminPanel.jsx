@@ -36,7 +36,7 @@ export default function AdminPanel() {
       const res = await axios.get('/admin/users', {
         headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` }
       })
-      setUsers(res.data)
+      setUsers(res.data.users)
     } catch (error) {
       toast({
         title: "Error",
@@ -39,7 +39,7 @@ export default function AuditLog() {
       const res = await axios.get('/admin/audit', {
         headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` }
       })
-      setLogs(res.data)
+      setLogs(res.data.logs)
     } catch (error) {
       toast({
         title: "Error",